@@ -17,10 +17,10 @@ from redbot.core.data_manager import bundled_data_path
 from redbot.core.i18n import Translator, cog_i18n, set_contextual_locales_from_guild
 from redbot.core.utils.chat_formatting import box, humanize_list
 
-from .autocomplete import REALMS
 from .enchantid import ENCHANT_ID
 from .encounterid import DIFFICULTIES, ZONES_BY_ID, ZONES_BY_SHORT_NAME
 from .http import WoWLogsClient, generate_bearer
+from .realm_index import REALM_INDEX
 
 _ = Translator("WarcraftLogsRetail", __file__)
 log = logging.getLogger("red.karlo-cogs.warcraftlogs")
@@ -300,8 +300,7 @@ class WarcraftLogsRetail(commands.Cog):
     async def warcraftlogs_gear_realm_autocomplete(
         self, interaction: discord.Interaction, current: str
     ) -> List[app_commands.Choice[str]]:
-        realms = await self.get_realms(current)
-        return realms[:25]
+        return REALM_INDEX.search(current)
 
     @commands.bot_has_permissions(embed_links=True)
     @warcraftlogs.command()
@@ -551,8 +550,7 @@ class WarcraftLogsRetail(commands.Cog):
     async def warcraftlogs_rank_realm_autocomplete(
         self, interaction: discord.Interaction, current: str
     ) -> List[app_commands.Choice[str]]:
-        realms = await self.get_realms(current)
-        return realms[:25]
+        return REALM_INDEX.search(current)
 
     @staticmethod
     def humanize_dps(dps: int | float) -> str:
@@ -788,17 +786,3 @@ class WarcraftLogsRetail(commands.Cog):
         else:
             return bearer
 
-    @staticmethod
-    async def get_realms(current):
-        realms = []
-        for realm in REALMS.keys():
-            if current.lower() not in realm.lower():
-                continue
-            if len(REALMS[realm]) == 1:
-                realms.append(app_commands.Choice(name=realm, value=f"{realm}:{REALMS[realm][0]}"))
-            else:
-                realms.extend(
-                    app_commands.Choice(name=f"{realm} ({region})", value=f"{realm}:{region}")
-                    for region in REALMS[realm]
-                )
-        return realms
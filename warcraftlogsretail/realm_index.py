@@ -0,0 +1,66 @@
+import bisect
+import itertools
+import unicodedata
+
+from discord import app_commands
+
+from .autocomplete import REALMS
+
+
+def fold(text: str) -> str:
+    """Lowercase text and strip its accents, so "ecarlate" matches "Écarlate"."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+class RealmIndex:
+    """
+    Realm autocomplete choices, built once instead of on every keystroke.
+
+    Realms whose name starts with what was typed come first, followed by realms that
+    only contain it.
+    """
+
+    def __init__(self, realms: dict[str, list[str]]):
+        entries = []
+        for realm, regions in realms.items():
+            if len(regions) == 1:
+                choices = [app_commands.Choice(name=realm, value=f"{realm}:{regions[0]}")]
+            else:
+                choices = [
+                    app_commands.Choice(name=f"{realm} ({region})", value=f"{realm}:{region}")
+                    for region in regions
+                ]
+            entries.append((fold(realm), choices))
+        entries.sort(key=lambda entry: entry[0])
+        self._keys = [key for key, __ in entries]
+        self._choices = [choices for __, choices in entries]
+
+    def search(self, current: str, limit: int = 25) -> list[app_commands.Choice[str]]:
+        """
+        Get the choices for realms matching what was typed.
+
+        :param current: What the user typed so far.
+        :param limit: Maximum amount of choices, Discord allows 25.
+        :return: Choices with "Realm:REGION" values.
+        """
+        query = fold(current.strip())
+        start = bisect.bisect_left(self._keys, query)
+        # Every key with this prefix sorts before the prefix followed by the highest character
+        end = bisect.bisect_left(self._keys, query + "\uffff", lo=start)
+        prefixed = range(start, end)
+        containing = (
+            index
+            for index, key in enumerate(self._keys)
+            if query in key and not start <= index < end
+        )
+
+        results = []
+        for index in itertools.chain(prefixed, containing):
+            results.extend(self._choices[index])
+            if len(results) >= limit:
+                break
+        return results[:limit]
+
+
+REALM_INDEX = RealmIndex(REALMS)
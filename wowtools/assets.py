@@ -0,0 +1,80 @@
+import io
+import logging
+import threading
+import time
+from pathlib import Path
+
+from PIL import Image, ImageFont
+
+log = logging.getLogger("red.karlo-cogs.wowtools")
+
+SCOREBOARD_BACKGROUND = "scoreboard-df-s1.png"
+SCOREBOARD_BACKGROUND_DEV = "scoreboard-jrk.png"
+SCOREBOARD_FONT = "Roboto-Bold.ttf"
+
+
+class AssetRegistry:
+    """
+    Bundled images and fonts, decoded once and shared by every render.
+
+    Images are handed out as copies of the decoded original. Font files are read once,
+    and each thread parses its own font objects from those bytes since FreeType faces
+    shouldn't be shared between threads.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.timings: dict[str, float] = {}
+        self._images: dict[str, Image.Image] = {}
+        self._fonts: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def load(self, images: list[str], fonts: list[str]) -> None:
+        """Decode the given images and read the given fonts. This blocks."""
+        for name in images:
+            self._load_image(name)
+        for name in fonts:
+            self._load_font(name)
+        log.debug(
+            "Loaded assets: "
+            + ", ".join(f"{name} ({ms:.1f}ms)" for name, ms in self.timings.items())
+        )
+
+    def image(self, name: str) -> Image.Image:
+        """Get a copy of a decoded image that is safe to draw on."""
+        image = self._images.get(name) or self._load_image(name)
+        return image.copy()
+
+    def font(self, name: str, size: int) -> ImageFont.FreeTypeFont:
+        """Get a font for the current thread."""
+        fonts: dict[tuple[str, int], ImageFont.FreeTypeFont] = getattr(self._local, "fonts", {})
+        self._local.fonts = fonts
+        if (name, size) not in fonts:
+            data = self._fonts.get(name) or self._load_font(name)
+            fonts[(name, size)] = ImageFont.truetype(io.BytesIO(data), size)
+        return fonts[(name, size)]
+
+    def stats(self) -> dict[str, str]:
+        return {name: f"{ms:.1f}ms" for name, ms in self.timings.items()}
+
+    def _load_image(self, name: str) -> Image.Image:
+        with self._lock:
+            if name not in self._images:
+                start = time.perf_counter()
+                image = Image.open(self.path / name)
+                image.load()
+                self._images[name] = image
+                self.timings[name] = (time.perf_counter() - start) * 1000
+        return self._images[name]
+
+    def _load_font(self, name: str) -> bytes:
+        with self._lock:
+            if name not in self._fonts:
+                start = time.perf_counter()
+                data = (self.path / name).read_bytes()
+                # Parse it once so a broken font shows up at load time and not mid-render
+                ImageFont.truetype(io.BytesIO(data), 12)
+                self._fonts[name] = data
+                self.timings[name] = (time.perf_counter() - start) * 1000
+        return self._fonts[name]
@@ -0,0 +1,204 @@
+import asyncio
+import time
+from array import array
+from collections.abc import AsyncIterable, Iterable
+from dataclasses import dataclass
+from functools import cached_property
+
+import aiohttp
+import ijson
+import numpy as np
+from aiowowapi import WowApi
+
+# Regional commodities are stored under this ID in place of a connected realm ID
+COMMODITIES = 0
+
+
+@dataclass
+class ItemPrices:
+    """Every auction of one item, or of several items sharing a name, sorted by price."""
+
+    item_id: int
+    prices: np.ndarray
+    quantities: np.ndarray
+    # Some auctions only had a buyout for the whole auction and no unit price
+    buyout_only: bool = False
+
+    @property
+    def min_price(self) -> int:
+        return int(self.prices[0])
+
+    @cached_property
+    def quantity(self) -> int:
+        return int(self.quantities.sum())
+
+    @cached_property
+    def _cumulative_quantities(self) -> np.ndarray:
+        return np.cumsum(self.quantities)
+
+    def quantity_at_or_below(self, price: int) -> int:
+        """How many units could be bought without paying more than ``price`` per unit."""
+        end = np.searchsorted(self.prices, price, side="right")
+        return int(self._cumulative_quantities[end - 1]) if end else 0
+
+    def quantile(self, q: float) -> int:
+        """
+        Unit price below which ``q`` of all listed units are, e.g. 0.5 for the median.
+
+        :param q: Quantile between 0 and 1.
+        :return: Price of the unit at that quantile.
+        """
+        cumulative = self._cumulative_quantities
+        index = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+        return int(self.prices[min(index, len(self.prices) - 1)])
+
+    def weighted_average(self) -> float:
+        """Average unit price of all listed units."""
+        return float(np.average(self.prices, weights=self.quantities))
+
+
+@dataclass
+class AuctionSnapshot:
+    """
+    Auctions of a connected realm, or the regional commodities, as parallel columns.
+
+    The columns are sorted by item ID and then by price, so every item's auctions are a
+    contiguous slice that is already sorted by price.
+    """
+
+    item_ids: np.ndarray
+    prices: np.ndarray
+    quantities: np.ndarray
+    buyout_only: np.ndarray
+    fetched_at: float
+
+    @classmethod
+    def from_auctions(cls, auctions: Iterable[dict]) -> "AuctionSnapshot":
+        """Convert auctions from an already parsed API response."""
+        columns = _Columns()
+        for auction in auctions:
+            columns.add(auction)
+        return columns.build()
+
+    @classmethod
+    async def from_stream(cls, auctions: AsyncIterable[dict]) -> "AuctionSnapshot":
+        """Convert auctions as they are parsed from a response stream."""
+        columns = _Columns()
+        async for auction in auctions:
+            columns.add(auction)
+        return await asyncio.to_thread(columns.build)
+
+    def __contains__(self, item_id: int) -> bool:
+        start, end = self._slice(item_id)
+        return start != end
+
+    def lookup(self, item_ids: list[int]) -> ItemPrices | None:
+        """
+        Get the auctions of several item IDs, e.g. every item sharing a name.
+
+        :param item_ids: Item IDs to look up.
+        :return: Their combined auctions with the ID of the cheapest item, or None if none
+            of them are listed.
+        """
+        slices = [(item_id, *self._slice(item_id)) for item_id in item_ids]
+        slices = [(item_id, start, end) for item_id, start, end in slices if start != end]
+        if not slices:
+            return None
+        if len(slices) == 1:
+            item_id, start, end = slices[0]
+            return ItemPrices(
+                item_id,
+                self.prices[start:end],
+                self.quantities[start:end],
+                bool(self.buyout_only[start:end].any()),
+            )
+
+        cheapest_id = min(slices, key=lambda s: self.prices[s[1]])[0]
+        prices = np.concatenate([self.prices[start:end] for __, start, end in slices])
+        order = np.argsort(prices, kind="stable")
+        return ItemPrices(
+            cheapest_id,
+            prices[order],
+            np.concatenate([self.quantities[start:end] for __, start, end in slices])[order],
+            any(self.buyout_only[start:end].any() for __, start, end in slices),
+        )
+
+    def summary(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Summarize every listed item at once.
+
+        :return: Item IDs with their min price, quantity-weighted median price and quantity.
+        """
+        if not len(self.item_ids):
+            empty = np.array([], dtype=np.int64)
+            return empty, empty, empty, empty
+        starts = np.flatnonzero(np.diff(self.item_ids, prepend=self.item_ids[0] - 1))
+        quantities = np.add.reduceat(self.quantities, starts)
+        # Quantities are positive, so the running total over all items is increasing and
+        # can be searched for each item's halfway point
+        cumulative = np.cumsum(self.quantities)
+        before = cumulative[starts] - self.quantities[starts]
+        medians = self.prices[np.searchsorted(cumulative, before + 0.5 * quantities)]
+        return self.item_ids[starts], self.prices[starts], medians, quantities
+
+    def _slice(self, item_id: int) -> tuple[int, int]:
+        start = int(np.searchsorted(self.item_ids, item_id, side="left"))
+        end = int(np.searchsorted(self.item_ids, item_id, side="right"))
+        return start, end
+
+
+class _Columns:
+    """Packed columns that auctions are appended to before they get sorted."""
+
+    def __init__(self):
+        self.item_ids = array("q")
+        self.prices = array("q")
+        self.quantities = array("q")
+        self.buyout_only = array("b")
+
+    def add(self, auction: dict) -> None:
+        price = auction.get("unit_price")
+        buyout_only = price is None
+        if buyout_only:
+            price = auction.get("buyout")
+            if price is None:
+                # Bid only auctions have no price to show
+                return
+        self.item_ids.append(auction["item"]["id"])
+        self.prices.append(price)
+        self.quantities.append(auction["quantity"])
+        self.buyout_only.append(buyout_only)
+
+    def build(self) -> AuctionSnapshot:
+        item_ids = np.frombuffer(self.item_ids, dtype=np.int64)
+        prices = np.frombuffer(self.prices, dtype=np.int64)
+        order = np.lexsort((prices, item_ids))
+        return AuctionSnapshot(
+            item_ids[order],
+            prices[order],
+            np.frombuffer(self.quantities, dtype=np.int64)[order],
+            np.frombuffer(self.buyout_only, dtype=np.int8)[order].astype(np.bool_),
+            time.time(),
+        )
+
+
+async def fetch_auction_snapshot(
+    session: aiohttp.ClientSession, api: WowApi, endpoint: str
+) -> AuctionSnapshot:
+    """
+    Download an auctions or commodities dump and convert it while it streams in.
+
+    The dumps can be hundreds of MB once parsed whole, so the ``auctions`` array is parsed
+    one auction at a time and only the fields the snapshot needs are kept.
+
+    :param session: Session to download with.
+    :param api: Blizzard API client, used for its region, locale and access token.
+    :param endpoint: Game Data API endpoint of the dump.
+    :return: The converted snapshot.
+    """
+    params = {"namespace": f"dynamic-{api.get_region().lower()}", "locale": api.get_locale()}
+    headers = {"Authorization": f"Bearer {await api.get_access_token()}"}
+    url = api.get_hostname().format(api_endpoint=endpoint)
+    async with session.get(url, params=params, headers=headers) as resp:
+        resp.raise_for_status()
+        return await AuctionSnapshot.from_stream(ijson.items_async(resp.content, "auctions.item"))
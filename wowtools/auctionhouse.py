@@ -1,20 +1,36 @@
+import asyncio
+import functools
+import io
+import logging
+import time
 from datetime import datetime, timezone
-from typing import Dict
+from typing import Dict, Optional
 
 import discord
+import numpy as np
+from aiowowapi import WowApi
+from discord.ext import tasks
 from redbot.core import commands
 from redbot.core.i18n import Translator
 
-from .utils import format_to_gold
+from .auction_snapshots import COMMODITIES, AuctionSnapshot, ItemPrices, fetch_auction_snapshot
+from .charts import ChartSeries, render_line_chart
+from .config_snapshot import ConfigSnapshot
+from .ratelimit import WEIGHT_AUCTIONS, WEIGHT_COMMODITIES, WEIGHT_SEARCH, Priority
+from .utils import format_chart_gold, format_to_gold
 
+log = logging.getLogger("red.karlo-cogs.wowtools")
 _ = Translator("WoWTools", __file__)
 
+# Realms are rarely added or merged, so a day old index is still good
+CONNECTED_REALMS_MAX_AGE = 60 * 60 * 24
+# Realms looked up in a command keep being refreshed for this long after the last lookup
+AUCTION_LOOKUP_WINDOW = 60 * 60 * 24
+
 
 class AuctionHouse:
-    @commands.cooldown(rate=1, per=10, type=commands.BucketType.user)
-    @commands.command()
-    async def price(self, ctx: commands.Context, *, item: str):
-        """Get the current auction price of an item."""
+    async def _get_auction_house_realm(self, ctx: commands.Context) -> tuple[str, str] | None:
+        """Get the guild's region and realm, telling the user if they aren't set up."""
         config_region: str = await self.config.guild(ctx.guild).region()
         if not config_region:
             await ctx.send(
@@ -23,7 +39,7 @@ class AuctionHouse:
                 ).format(prefix=ctx.clean_prefix if not ctx.interaction else ""),
                 ephemeral=True,
             )
-            return
+            return None
         if config_region == "cn":
             await ctx.send(
                 _(
@@ -32,7 +48,7 @@ class AuctionHouse:
                 ).format(prefix=ctx.clean_prefix if not ctx.interaction else ""),
                 ephemeral=True,
             )
-            return
+            return None
 
         config_realm: str = await self.config.guild(ctx.guild).realm()
         if not config_realm:
@@ -42,8 +58,17 @@ class AuctionHouse:
                 ).format(prefix=ctx.clean_prefix if not ctx.interaction else ""),
                 ephemeral=True,
             )
+            return None
+        return config_region, config_realm
+
+    @commands.cooldown(rate=1, per=10, type=commands.BucketType.user)
+    @commands.command()
+    async def price(self, ctx: commands.Context, *, item: str):
+        """Get the current auction price of an item."""
+        realm = await self._get_auction_house_realm(ctx)
+        if not realm:
             return
-        boe_disclaimer = False
+        config_region, config_realm = realm
 
         async with ctx.typing():
             client = self.blizzard.get(config_region)
@@ -60,88 +85,31 @@ class AuctionHouse:
             async with client as wow_client:
                 wow_client = wow_client.Retail
                 # Search for the item
-                await self.limiter.acquire()
-                items = await wow_client.GameData.get_item_search(
-                    {"name.en_US": item, "_pageSize": 1000}
-                )
-
-                results: Dict = items["results"]
-                found_items: Dict[int, str] = {}
-                for result in results:
-                    item_id: int = result["data"]["id"]
-                    item_name: str = result["data"]["name"]["en_US"]
-                    if found_items:
-                        if item_name in found_items.values():
-                            continue
-                    elif item.lower() in item_name.lower():
-                        item = item_name  # Use the exact name for all further searches
-                        found_items[item_id] = item_name
+                found_items = await self.search_for_item(item, config_region, wow_client)
                 if not found_items:
                     await ctx.send(_("No results found."))
                     return
 
                 # Get connected realm ID
-                await self.limiter.acquire()
-                c_realms = await wow_client.GameData.get_connected_realms_search(
-                    {"_pageSize": 1000}
+                c_realm_id = await self.get_connected_realm_id(
+                    config_region, config_realm, wow_client
                 )
-
-                c_realm_id = None
-                results: Dict = c_realms["results"]
-                for result in results:
-                    c_realm_data = result["data"]
-                    realms = c_realm_data["realms"]
-                    for realm in realms:
-                        realm_names = list(realm["name"].values())
-                        realm_names = [name.lower() for name in realm_names]
-                        if config_realm in realm_names:
-                            c_realm_id = c_realm_data["id"]
                 if not c_realm_id:
                     await ctx.send(_("Could not find realm."))
                     return
 
                 # Get price of item
-                await self.limiter.acquire()
-                auctions_data: Dict = await wow_client.GameData.get_auctions(
-                    connected_realm_id=c_realm_id
-                )
-
-                auctions = auctions_data["auctions"]
-                prices = []
-                item_quantity = 0
-                for auction in auctions:
-                    item_id = auction["item"]["id"]
-                    if item_id in found_items:
-                        item_name = found_items[item_id]
-                        found_item_id = item_id
-                        item_quantity += auction["quantity"]
-                        try:
-                            item_price = auction["unit_price"]
-                        except KeyError:
-                            item_price = auction["buyout"]
-                            boe_disclaimer = True
-                        prices.append(item_price)
-                if not prices:
-                    # Item could be a commodity
-                    await self.limiter.acquire(25)
-                    commodities_data: Dict = await wow_client.GameData.get_commodities()
-                    auctions = commodities_data["auctions"]
-                    for auction in auctions:
-                        item_id = auction["item"]["id"]
-                        if item_id in found_items:
-                            item_name = found_items[item_id]
-                            found_item_id = item_id
-                            item_quantity += auction["quantity"]
-                            item_price = auction["unit_price"]
-                            prices.append(item_price)
+                prices = await self.get_item_prices(config_region, c_realm_id, list(found_items))
                 if not prices:
                     await ctx.send(_("No auctions could be found for this item."))
                     return
+                found_item_id = prices.item_id
+                item_name = found_items[found_item_id]
 
                 # Embed stuff
                 # Get item icon
-                await self.limiter.acquire()
-                item_media = await wow_client.GameData.get_item_media(item_id=found_item_id)
+                async with self.limiter.limit(config_region):
+                    item_media = await wow_client.GameData.get_item_media(item_id=found_item_id)
                 item_icon_url = item_media["assets"][0]["value"]
 
                 # Create embed
@@ -155,10 +123,10 @@ class AuctionHouse:
                 )
                 embed.set_thumbnail(url=item_icon_url)
                 gold_emotes: Dict = await self.config.emotes()
-                min_buyout = format_to_gold(min(prices), gold_emotes)
+                min_buyout = format_to_gold(prices.min_price, gold_emotes)
                 embed.add_field(name=_("Min Buyout"), value=min_buyout)
-                embed.add_field(name=_("Current quantity"), value=str(item_quantity))
-                if boe_disclaimer:
+                embed.add_field(name=_("Current quantity"), value=str(prices.quantity))
+                if prices.buyout_only:
                     embed.add_field(
                         name=_("Warning"),
                         value=_(
@@ -185,6 +153,266 @@ class AuctionHouse:
 
         await ctx.send(embed=embed, view=view)
 
+    @commands.cooldown(rate=1, per=10, type=commands.BucketType.user)
+    @commands.command()
+    async def pricehistory(self, ctx: commands.Context, days: Optional[int] = 14, *, item: str):
+        """Show how the auction price of an item changed over the last few days."""
+        realm = await self._get_auction_house_realm(ctx)
+        if not realm:
+            return
+        config_region, config_realm = realm
+        days = max(1, min(days, 365))
+
+        async with ctx.typing():
+            client = self.blizzard.get(config_region)
+            if not client:
+                await ctx.send(_("The Blizzard API is not properly set up."))
+                return
+            async with client as wow_client:
+                wow_client = wow_client.Retail
+                found_items = await self.search_for_item(item, config_region, wow_client)
+                if not found_items:
+                    await ctx.send(_("No results found."))
+                    return
+                c_realm_id = await self.get_connected_realm_id(
+                    config_region, config_realm, wow_client
+                )
+                if not c_realm_id:
+                    await ctx.send(_("Could not find realm."))
+                    return
+
+            # Makes sure the realm is tracked for a while and has at least the current point
+            await self.get_item_prices(config_region, c_realm_id, list(found_items))
+            since = time.time() - days * 60 * 60 * 24
+            for snapshot_id in (c_realm_id, COMMODITIES):
+                write = self.price_history_writes.get((config_region.lower(), snapshot_id))
+                if write:
+                    # Shielded so that a cancelled command doesn't cancel the write
+                    await asyncio.shield(write)
+                history = await self.price_history.get(
+                    config_region.lower(), snapshot_id, list(found_items), since
+                )
+                if history:
+                    break
+            else:
+                await ctx.send(_("No auctions could be found for this item."))
+                return
+
+            series = [
+                ChartSeries(
+                    _("Min Buyout"), "#f1c40f", [(p.timestamp, p.min_price) for p in history]
+                ),
+                ChartSeries(
+                    _("Median"), "#3498db", [(p.timestamp, p.median_price) for p in history]
+                ),
+            ]
+            chart = await asyncio.get_running_loop().run_in_executor(
+                self.render_executor,
+                functools.partial(render_line_chart, series, self.assets, format_chart_gold),
+            )
+
+            item_name = next(iter(found_items.values()))
+            embed = discord.Embed(
+                title=_("Price history: {item}").format(item=item_name),
+                url=f"https://www.wowhead.com/item={next(iter(found_items))}",
+                colour=await ctx.embed_color(),
+                timestamp=datetime.now(timezone.utc),
+            )
+            embed.set_image(url="attachment://pricehistory.png")
+            gold_emotes: Dict = await self.config.emotes()
+            embed.add_field(
+                name=_("Lowest in {days} days").format(days=days),
+                value=format_to_gold(min(p.min_price for p in history), gold_emotes),
+            )
+            embed.add_field(
+                name=_("Highest in {days} days").format(days=days),
+                value=format_to_gold(max(p.min_price for p in history), gold_emotes),
+            )
+            embed.add_field(name=_("Current quantity"), value=str(history[-1].quantity))
+
+        await ctx.send(embed=embed, file=discord.File(io.BytesIO(chart), "pricehistory.png"))
+
+    async def get_item_prices(
+        self, region: str, c_realm_id: int, item_ids: list[int]
+    ) -> ItemPrices | None:
+        """
+        Look up items in a realm's auctions, falling back to the regional commodities.
+
+        :param region: Region of the realm.
+        :param c_realm_id: Connected realm ID.
+        :param item_ids: IDs of the items to look up.
+        :return: Combined prices of the items, or None if none of them are listed.
+        """
+        for snapshot_id in (c_realm_id, COMMODITIES):
+            snapshot = await self.get_auction_snapshot(region, snapshot_id)
+            prices = snapshot.lookup(item_ids)
+            if prices:
+                return prices
+        return None
+
+    async def get_auction_snapshot(self, region: str, c_realm_id: int) -> AuctionSnapshot:
+        """Get a realm's auctions from memory, fetching them if the realm isn't tracked yet."""
+        region = region.lower()
+        self.auction_lookups[(region, c_realm_id)] = time.monotonic()
+
+        async def fetch() -> AuctionSnapshot:
+            snapshot = await self._fetch_auction_snapshot(region, c_realm_id)
+            # Someone is waiting for the snapshot, so don't make them wait for the write too
+            task = asyncio.create_task(self._record_price_history(region, c_realm_id, snapshot))
+            self.price_history_writes[(region, c_realm_id)] = task
+            task.add_done_callback(
+                functools.partial(self._forget_price_history_write, (region, c_realm_id))
+            )
+            return snapshot
+
+        return await self.auction_snapshots.get((region, c_realm_id), fetch)
+
+    async def _fetch_auction_snapshot(
+        self,
+        region: str,
+        c_realm_id: int,
+        priority: Priority = Priority.INTERACTIVE,
+        client: WowApi | None = None,
+    ) -> AuctionSnapshot:
+        if c_realm_id == COMMODITIES:
+            weight = WEIGHT_COMMODITIES
+            endpoint = "/data/wow/auctions/commodities"
+        else:
+            weight = WEIGHT_AUCTIONS
+            endpoint = f"/data/wow/connected-realm/{c_realm_id}/auctions"
+        async with self.limiter.limit(region, weight, priority):
+            snapshot = await fetch_auction_snapshot(
+                self.session, client or self.blizzard[region], endpoint
+            )
+        self.item_index.mark_tradeable(np.unique(snapshot.item_ids).tolist())
+        return snapshot
+
+    async def _record_price_history(
+        self, region: str, c_realm_id: int, snapshot: AuctionSnapshot
+    ) -> None:
+        try:
+            await self.price_history.record(region, c_realm_id, snapshot)
+        except Exception:
+            log.error(f"Failed to record price history of {c_realm_id} ({region}).", exc_info=True)
+
+    def _forget_price_history_write(self, key: tuple[str, int], task: asyncio.Task) -> None:
+        # A newer snapshot of the same realm may already be writing
+        if self.price_history_writes.get(key) is task:
+            del self.price_history_writes[key]
+
+    # Blizzard updates the auction house dumps about once an hour
+    @tasks.loop(hours=1)
+    async def refresh_auction_snapshots(self):
+        # Realms set up in guilds, plus the realms someone has looked up recently. The
+        # snapshots of the rest are left to expire
+        config_snapshot = await ConfigSnapshot.build(self.config)
+        tracked: dict[str, set[str | int]] = {}
+        for guild in config_snapshot.enabled_guilds(self.bot, "auction_house"):
+            settings = config_snapshot[guild.id]
+            tracked.setdefault(settings["region"].lower(), set()).add(settings["realm"])
+        looked_up_since = time.monotonic() - AUCTION_LOOKUP_WINDOW
+        for key, looked_up_at in list(self.auction_lookups.items()):
+            if looked_up_at < looked_up_since:
+                del self.auction_lookups[key]
+                continue
+            region, c_realm_id = key
+            tracked.setdefault(region, set()).add(c_realm_id)
+
+        for region, realms in tracked.items():
+            # Holding a command client for the whole refresh would close its session under
+            # the commands that use it
+            client = await self.background_blizzard("auction snapshots", region)
+            if not client:
+                continue
+            async with client as wow_client:
+                wow_client = wow_client.Retail
+                c_realm_ids = {COMMODITIES}
+                for realm in realms:
+                    if isinstance(realm, int):
+                        c_realm_ids.add(realm)
+                        continue
+                    try:
+                        c_realm_id = await self.get_connected_realm_id(
+                            region, realm, wow_client, Priority.BULK
+                        )
+                    except Exception:
+                        log.error(f"Failed to resolve realm {realm} ({region}).", exc_info=True)
+                        continue
+                    if c_realm_id:
+                        c_realm_ids.add(c_realm_id)
+
+                for c_realm_id in c_realm_ids:
+                    try:
+                        snapshot = await self._fetch_auction_snapshot(
+                            region, c_realm_id, Priority.BULK, client
+                        )
+                    except Exception:
+                        log.error(
+                            f"Failed to refresh auctions of {c_realm_id} ({region}).",
+                            exc_info=True,
+                        )
+                        continue
+                    self.auction_snapshots.set((region, c_realm_id), snapshot)
+                    await self._record_price_history(region, c_realm_id, snapshot)
+
+    @refresh_auction_snapshots.before_loop
+    async def before_refresh_auction_snapshots(self):
+        # Set at the end of cog_load, after the Blizzard clients are created
+        await self.item_index_loaded.wait()
+
+    @refresh_auction_snapshots.error
+    async def refresh_auction_snapshots_error(self, error):
+        log.error(f"Unhandled error in refresh_auction_snapshots task: {error}", exc_info=True)
+
+    @tasks.loop(hours=24)
+    async def compact_price_history(self):
+        await self.price_history.compact()
+
+    @compact_price_history.error
+    async def compact_price_history_error(self, error):
+        log.error(f"Unhandled error in compact_price_history task: {error}", exc_info=True)
+
+    @tasks.loop(hours=24)
+    async def refresh_item_index(self):
+        # Item names are the same in every region, so any client will do
+        region = next((region for region in ("us", "eu", "kr") if region in self.blizzard), None)
+        if not region:
+            return
+        # Crawls take hundreds of requests, too long to hold a client that commands use
+        async with await self.background_blizzard("item index", region) as wow_client:
+            added = await self.item_index.update(wow_client.Retail, self.limiter, region)
+        log.debug(f"Added {added} items to the item index, {len(self.item_index)} in total.")
+
+    @refresh_item_index.before_loop
+    async def before_refresh_item_index(self):
+        # Wait for cog_load to load the previous crawl, so only newer items get crawled
+        await self.item_index_loaded.wait()
+
+    @refresh_item_index.error
+    async def refresh_item_index_error(self, error):
+        log.error(f"Unhandled error in refresh_item_index task: {error}", exc_info=True)
+
+    @tasks.loop(hours=1)
+    async def refresh_connected_realms(self):
+        for region in self.connected_realms.regions():
+            if not self.connected_realms.is_stale(region, CONNECTED_REALMS_MAX_AGE):
+                continue
+            client = await self.background_blizzard("connected realms", region)
+            if not client:
+                continue
+            try:
+                async with (
+                    client as wow_client,
+                    self.limiter.limit(region, WEIGHT_SEARCH, Priority.BULK),
+                ):
+                    await self.connected_realms.refresh(region, wow_client.Retail)
+            except Exception:
+                log.error(f"Failed to refresh connected realms for {region}.", exc_info=True)
+
+    @refresh_connected_realms.error
+    async def refresh_connected_realms_error(self, error):
+        log.error(f"Unhandled error in refresh_connected_realms task: {error}", exc_info=True)
+
 
 # TODO: [p]stackprice [item]
 # TODO: [p]craftprice [item]
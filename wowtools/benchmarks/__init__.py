@@ -0,0 +1,22 @@
+"""
+Micro-benchmarks for the cog's hot paths, each comparing the current implementation with
+the one it replaced and checking that both give the same results.
+
+They aren't loaded by the cog. Run one from the repository root, for example::
+
+    python -m wowtools.benchmarks.bench_scoreboard_image
+"""
+
+import statistics
+import time
+from collections.abc import Callable
+
+
+def median_ms(func: Callable[[], object], repeat: int) -> float:
+    """Call ``func`` ``repeat`` times and return the median duration in milliseconds."""
+    durations = []
+    for __ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations) * 1000
@@ -0,0 +1,179 @@
+"""
+Index a synthetic 500k row commodities dump with the old per-item dict loop and as sorted
+NumPy columns, then query both for the same items and check that they agree on the min
+price, quantity, quantiles, weighted average and quantity at or below a price.
+"""
+
+import math
+import random
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any
+
+from wowtools.auction_snapshots import AuctionSnapshot
+from wowtools.benchmarks import median_ms
+
+ROWS = 500_000
+ITEMS = 30_000
+QUERIES = 2_000
+REPEAT = 5
+QUANTILES = (0.1, 0.5, 0.9)
+
+
+@dataclass
+class OldItemPrices:
+    item_id: int
+    min_price: int
+    quantity: int
+    # Price -> quantity listed at that price
+    histogram: dict[int, int] = field(default_factory=dict)
+    buyout_only: bool = False
+
+    def quantity_at_or_below(self, price: int) -> int:
+        return sum(quantity for p, quantity in self.histogram.items() if p <= price)
+
+    def quantile(self, q: float) -> int:
+        target = q * self.quantity
+        running = 0
+        price = 0
+        for price, quantity in sorted(self.histogram.items()):
+            running += quantity
+            if running >= target:
+                break
+        return price
+
+    def weighted_average(self) -> float:
+        return sum(price * quantity for price, quantity in self.histogram.items()) / self.quantity
+
+
+def index_old(auctions: list[dict]) -> dict[int, OldItemPrices]:
+    """AuctionSnapshot.from_auctions before the NumPy columns."""
+    items: dict[int, OldItemPrices] = {}
+    for auction in auctions:
+        price = auction.get("unit_price")
+        buyout_only = price is None
+        if buyout_only:
+            price = auction.get("buyout")
+            if price is None:
+                # Bid only auctions have no price to show
+                continue
+        item_id = auction["item"]["id"]
+        quantity = auction["quantity"]
+        prices = items.get(item_id)
+        if prices is None:
+            prices = items[item_id] = OldItemPrices(item_id, price, 0)
+        elif price < prices.min_price:
+            prices.min_price = price
+        prices.quantity += quantity
+        prices.histogram[price] = prices.histogram.get(price, 0) + quantity
+        prices.buyout_only |= buyout_only
+    return items
+
+
+def lookup_old(items: dict[int, OldItemPrices], item_ids: list[int]) -> OldItemPrices | None:
+    """AuctionSnapshot.lookup before the NumPy columns."""
+    found = [items[item_id] for item_id in item_ids if item_id in items]
+    if not found:
+        return None
+    if len(found) == 1:
+        return found[0]
+    cheapest = min(found, key=lambda prices: prices.min_price)
+    combined = OldItemPrices(cheapest.item_id, cheapest.min_price, 0)
+    for prices in found:
+        combined.quantity += prices.quantity
+        combined.buyout_only |= prices.buyout_only
+        for price, quantity in prices.histogram.items():
+            combined.histogram[price] = combined.histogram.get(price, 0) + quantity
+    return combined
+
+
+def make_auctions(rng: random.Random) -> list[dict]:
+    base_prices = [int(rng.lognormvariate(11, 2)) + 1 for __ in range(ITEMS)]
+    auctions = []
+    for auction_id in range(ROWS):
+        item_id = rng.randrange(ITEMS)
+        auction = {
+            "id": auction_id,
+            "item": {"id": item_id},
+            "quantity": rng.choice((1, 1, 1, 5, 20, 200)),
+            "time_left": "LONG",
+        }
+        # Few distinct prices per item, like real commodities undercut in small steps
+        price = base_prices[item_id] + rng.randrange(20) * 100
+        kind = rng.random()
+        if kind < 0.01:
+            auction["bid"] = price
+        elif kind < 0.03:
+            auction["buyout"] = price
+        else:
+            auction["unit_price"] = price
+        auctions.append(auction)
+    return auctions
+
+
+def make_queries(rng: random.Random) -> list[list[int]]:
+    # Items sharing a name are looked up together, and some IDs are never listed
+    return [
+        [rng.randrange(ITEMS + 100) for __ in range(rng.choice((1, 1, 1, 2, 3)))]
+        for __ in range(QUERIES)
+    ]
+
+
+def run_queries(lookup: Callable[[list[int]], Any], queries: list[list[int]]) -> list:
+    results = []
+    for item_ids in queries:
+        prices = lookup(item_ids)
+        if prices is None:
+            results.append(None)
+            continue
+        results.append(
+            (
+                prices.item_id,
+                prices.min_price,
+                prices.quantity,
+                prices.buyout_only,
+                [prices.quantile(q) for q in QUANTILES],
+                prices.weighted_average(),
+                prices.quantity_at_or_below(prices.min_price + 500),
+            )
+        )
+    return results
+
+
+def main() -> None:
+    rng = random.Random(15)
+    auctions = make_auctions(rng)
+    queries = make_queries(rng)
+
+    items = index_old(auctions)
+    snapshot = AuctionSnapshot.from_auctions(auctions)
+    old_results = run_queries(partial(lookup_old, items), queries)
+    new_results = run_queries(snapshot.lookup, queries)
+    for item_ids, old, new in zip(queries, old_results, new_results):
+        if old is None or new is None:
+            assert old is new, f"Only one lookup found {item_ids}"
+            continue
+        *old_exact, old_average, old_at_or_below = old
+        *new_exact, new_average, new_at_or_below = new
+        assert old_exact == new_exact, f"Lookup of {item_ids} differs"
+        assert old_at_or_below == new_at_or_below, f"Quantity at or below of {item_ids} differs"
+        assert math.isclose(old_average, new_average), f"Average of {item_ids} differs"
+    print(f"Results are identical for {QUERIES} lookups in {ROWS} rows.")
+
+    timings = {
+        "dict index ingest": median_ms(lambda: index_old(auctions), REPEAT),
+        "columnar ingest": median_ms(lambda: AuctionSnapshot.from_auctions(auctions), REPEAT),
+        "dict index queries": median_ms(
+            lambda: run_queries(partial(lookup_old, items), queries), REPEAT
+        ),
+        "columnar queries": median_ms(lambda: run_queries(snapshot.lookup, queries), REPEAT),
+    }
+    for name, ms in timings.items():
+        print(f"{name + ':':<20} {ms:8.1f} ms")
+    old_us, new_us = (timings[name] / QUERIES * 1000 for name in timings if "queries" in name)
+    print(f"per query: {old_us:.0f} us -> {new_us:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
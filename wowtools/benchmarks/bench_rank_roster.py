@@ -0,0 +1,97 @@
+"""
+Rank a synthetic 5,000 member guild roster with 200 blacklisted names, with the old
+dict-and-full-sort scoreboard code and with Scoreboard._rank_roster, and check that both
+pick the same top characters.
+"""
+
+import random
+
+from wowtools.benchmarks import median_ms
+from wowtools.scoreboard import Scoreboard
+
+MEMBERS = 5000
+BLACKLISTED = 200
+# Characters sharing a name with another member on a different realm
+NAMESAKES = 100
+REPEAT = 30
+CLASSES = ["Death Knight", "Demon Hunter", "Druid", "Evoker", "Hunter", "Mage", "Monk"]
+
+
+def letters_name(index: int) -> str:
+    name = ""
+    while True:
+        index, letter = divmod(index, 26)
+        name += chr(97 + letter)
+        if not index:
+            return "Char" + name
+
+
+def make_roster(rng: random.Random) -> tuple[list[dict], list[str]]:
+    names = [letters_name(index) for index in range(MEMBERS)]
+    # Names with digits are never ranked
+    for index in range(0, MEMBERS, 50):
+        names[index] += "2"
+    for index in rng.sample(range(MEMBERS), NAMESAKES):
+        names[index] = names[rng.randrange(MEMBERS)]
+
+    roster = []
+    for index, name in enumerate(names):
+        roster.append(
+            {
+                "character": {
+                    "name": name,
+                    "realm": f"realm-{index % 7}",
+                    "class": {"name": rng.choice(CLASSES)},
+                    "thumbnail": f"realm/{index % 256}/{index}-avatar.jpg",
+                    "items": {"item_level_equipped": rng.randint(600, 730)},
+                },
+                "keystoneScores": {
+                    # Rounded so that some scores tie
+                    "allScore": round(rng.uniform(0, 3600), -1),
+                    "allScoreColor": "#ff8000",
+                },
+            }
+        )
+    blacklist = [name.lower() for name in rng.sample(names, BLACKLISTED)]
+    return roster, blacklist
+
+
+def rank_roster_old(roster: list[dict], max_chars: int, sb_blacklist: list[str]) -> list:
+    """The text mode ranking of _get_dungeon_scores before _rank_roster."""
+    lb = {}
+    for char in roster:
+        char_name: str = char["character"]["name"]
+        if any(char.isdigit() for char in char_name):
+            continue
+
+        score = char["keystoneScores"]["allScore"]
+
+        if score > 250 and char_name.lower() not in sb_blacklist:
+            lb[char_name] = score
+
+    lb = dict(sorted(lb.items(), key=lambda i: i[1], reverse=True))
+
+    chars = list(lb.keys())[:max_chars]
+    scores = list(lb.values())[:max_chars]
+    return list(zip(chars, scores))
+
+
+def main() -> None:
+    roster, blacklist = make_roster(random.Random(11))
+    for max_chars in (10, 25, 100):
+        old = rank_roster_old(roster, max_chars, blacklist)
+        new = [
+            (char.name, char.score)
+            for char in Scoreboard._rank_roster(roster, max_chars, blacklist)
+        ]
+        assert old == new, f"Top {max_chars} differs"
+    print(f"Top characters are identical ({MEMBERS} members, {BLACKLISTED} blacklisted).")
+
+    old_ms = median_ms(lambda: rank_roster_old(roster, 25, blacklist), REPEAT)
+    new_ms = median_ms(lambda: Scoreboard._rank_roster(roster, 25, blacklist), REPEAT)
+    print(f"dict and full sort: {old_ms:.1f} ms")
+    print(f"_rank_roster:       {new_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Render a 10 row scoreboard where every row glows, with the old full-canvas blur and with
+the cached glow sprites, and check that both images are pixel-identical.
+"""
+
+import io
+from pathlib import Path
+
+from PIL import Image, ImageChops, ImageColor, ImageDraw, ImageFilter
+
+from wowtools.assets import SCOREBOARD_BACKGROUND, SCOREBOARD_FONT, AssetRegistry
+from wowtools.benchmarks import median_ms
+from wowtools.scoreboard_image import (
+    GLOW_ILVL,
+    GLOW_RADIUS,
+    ImageRow,
+    get_ilvl_color,
+    glow_sprite,
+    render_scoreboard,
+)
+
+DATA_PATH = Path(__file__).parent.parent / "data"
+REPEAT = 15
+ILVLS = ["721", "718", "715", "712", "710", "707", "702", "699", "693", "680"]
+CLASS_COLORS = ["#C41E3A", "#A330C9", "#FF7C0A", "#33937F", "#AAD372", "#3FC7EB", "#00FF98"]
+
+
+def make_rows() -> list[ImageRow]:
+    thumbnail = io.BytesIO()
+    Image.new("RGB", (65, 65), "#444444").save(thumbnail, format="PNG")
+    return [
+        ImageRow(
+            name=f"Character{index}",
+            score=str(3500 - index * 37),
+            score_color="#ff8000",
+            class_color=CLASS_COLORS[index % len(CLASS_COLORS)],
+            ilvl=ilvl,
+            thumbnail=thumbnail.getvalue(),
+        )
+        for index, ilvl in enumerate(ILVLS)
+    ]
+
+
+def render_scoreboard_full_canvas(rows: list[ImageRow], assets: AssetRegistry) -> bytes:
+    """render_scoreboard before the glow sprites, blurring a full-canvas layer per row."""
+    img = assets.image(SCOREBOARD_BACKGROUND)
+    draw = ImageDraw.Draw(img)
+    font = assets.font(SCOREBOARD_FONT, 28)
+
+    x = 150
+    y = 25
+
+    for row in rows:
+        score_color = ImageColor.getcolor(row.score_color, "RGB")
+        class_color = ImageColor.getcolor(row.class_color, "RGB")
+        ilvl_color = get_ilvl_color(int(row.ilvl))
+
+        if row.thumbnail:
+            img.paste(Image.open(io.BytesIO(row.thumbnail)), (x - 79, y - 15))
+
+        draw.text((x, y), row.name, class_color, font=font)
+        if int(row.ilvl) >= GLOW_ILVL:
+            glow = Image.new("RGBA", img.size, (0, 0, 0, 0))
+            ImageDraw.Draw(glow).text((x + 225, y), row.ilvl, ilvl_color, font=font)
+            blurred_glow = glow.filter(ImageFilter.GaussianBlur(GLOW_RADIUS))
+            ImageDraw.Draw(blurred_glow).text((x + 225, y), row.ilvl, ilvl_color, font=font)
+            img = Image.alpha_composite(img, blurred_glow)
+            draw = ImageDraw.Draw(img)
+        else:
+            draw.text((x + 225, y), row.ilvl, ilvl_color, font=font)
+        draw.text((x + 300, y), row.score, score_color, font=font)
+        y += 75
+
+    img_obj = io.BytesIO()
+    img.save(img_obj, format="PNG")
+    return img_obj.getvalue()
+
+
+def main() -> None:
+    assets = AssetRegistry(DATA_PATH)
+    assets.load([SCOREBOARD_BACKGROUND], [SCOREBOARD_FONT])
+    rows = make_rows()
+
+    old = Image.open(io.BytesIO(render_scoreboard_full_canvas(rows, assets)))
+    glow_sprite.cache_clear()
+    new = Image.open(io.BytesIO(render_scoreboard(rows, assets)))
+    assert old.size == new.size and old.mode == new.mode
+    assert ImageChops.difference(old, new).getbbox() is None, "images differ"
+    print("Images are pixel-identical.")
+
+    def render_cold() -> None:
+        glow_sprite.cache_clear()
+        render_scoreboard(rows, assets)
+
+    full_canvas = median_ms(lambda: render_scoreboard_full_canvas(rows, assets), REPEAT)
+    cold = median_ms(render_cold, REPEAT)
+    warm = median_ms(lambda: render_scoreboard(rows, assets), REPEAT)
+    print(f"Median of {REPEAT} renders of {len(rows)} glowing rows, including the PNG encode:")
+    print(f"  full-canvas blur:      {full_canvas:7.1f} ms")
+    print(f"  glow sprites (cold):   {cold:7.1f} ms")
+    print(f"  glow sprites (cached): {warm:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+log = logging.getLogger("red.karlo-cogs.wowtools")
+
+
+class _CoalescingCache:
+    """
+    Base of the in-memory caches for coroutine results.
+
+    Concurrent fetches of a key share a single upstream call instead of each making their
+    own. Failed calls are never cached. Subclasses decide when a cached entry is returned
+    and how long a fetched value stays usable.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        # key -> (fresh until, usable until, value)
+        self._data: dict[Hashable, tuple[float, float, Any]] = {}
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    async def _fetch_coalesced(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = self._start_fetch(key, fetch)
+        # Shielded so that a cancelled caller doesn't cancel the fetch for everyone else
+        return await asyncio.shield(task)
+
+    def _start_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = asyncio.create_task(self._fetch(key, fetch))
+        self._inflight[key] = task
+        return task
+
+    async def _fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await fetch()
+            self._store(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        raise NotImplementedError
+
+    def _put(self, key: Hashable, fresh_until: float, usable_until: float, value: Any) -> None:
+        self._data.pop(key, None)
+        self._data[key] = (fresh_until, usable_until, value)
+        if len(self._data) > self.maxsize:
+            self._evict()
+
+    def keys(self) -> list[Hashable]:
+        return list(self._data)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        for key in [key for key, (__, usable, __) in self._data.items() if usable <= now]:
+            del self._data[key]
+        # Entries are kept in insertion order, so the oldest ones go first
+        while len(self._data) > self.maxsize:
+            del self._data[next(iter(self._data))]
+
+
+class AsyncTTLCache(_CoalescingCache):
+    """In-memory cache for coroutine results with a time-to-live per entry."""
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        super().__init__(maxsize)
+        self.ttl = ttl
+
+    async def get(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Get a cached value, calling ``fetch`` to populate it if it is missing or expired.
+
+        :param key: Cache key.
+        :param fetch: Coroutine function returning the value for ``key``.
+        :return: The cached or freshly fetched value.
+        """
+        entry = self._data.get(key)
+        if entry and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[2]
+        return await self._fetch_coalesced(key, fetch)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires = time.monotonic() + self.ttl
+        self._put(key, expires, expires, value)
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self.set(key, value)
+
+
+class StaleWhileRevalidateCache(_CoalescingCache):
+    """
+    In-memory cache for coroutine results that answers from stale entries while refreshing them.
+
+    How long an entry stays fresh is decided from the value itself by ``ttl_for``. A fresh
+    entry is returned as is. An entry that went stale less than ``max_stale`` seconds ago is
+    returned right away and refreshed in the background. Missing and older entries are
+    fetched before returning. Values ``ttl_for`` gives no TTL are never cached.
+    """
+
+    def __init__(self, ttl_for: Callable[[Any], float], max_stale: float, maxsize: int = 1024):
+        super().__init__(maxsize)
+        self.ttl_for = ttl_for
+        self.max_stale = max_stale
+        self.stale_hits = 0
+
+    async def get(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Get a cached value, calling ``fetch`` to populate or refresh it.
+
+        :param key: Cache key.
+        :param fetch: Coroutine function returning the value for ``key``.
+        :return: The cached, stale or freshly fetched value.
+        """
+        entry = self._data.get(key)
+        now = time.monotonic()
+        if entry and entry[0] > now:
+            self.hits += 1
+            return entry[2]
+        if entry and entry[1] > now:
+            self.stale_hits += 1
+            if key not in self._inflight:
+                self._start_fetch(key, fetch).add_done_callback(self._log_failed_refresh)
+            return entry[2]
+        return await self._fetch_coalesced(key, fetch)
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        ttl = self.ttl_for(value)
+        if ttl > 0:
+            fresh_until = time.monotonic() + ttl
+            self._put(key, fresh_until, fresh_until + self.max_stale, value)
+
+    @staticmethod
+    def _log_failed_refresh(task: asyncio.Task) -> None:
+        # Nobody awaits a background refresh, so its errors would go unnoticed otherwise
+        if not task.cancelled() and task.exception() is not None:
+            log.warning("Failed to refresh a stale cache entry.", exc_info=task.exception())
+
+    def stats(self) -> dict[str, int]:
+        stats = super().stats()
+        stats["stale hits"] = self.stale_hits
+        return stats
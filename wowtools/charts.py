@@ -0,0 +1,89 @@
+import io
+from collections.abc import Callable
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from PIL import Image, ImageColor, ImageDraw
+
+from .assets import SCOREBOARD_FONT, AssetRegistry
+
+BACKGROUND = "#2b2d31"
+GRID = "#3f4147"
+TEXT = "#dbdee1"
+
+
+class ChartSeries(NamedTuple):
+    label: str
+    color: str
+    # (unix timestamp, value) pairs sorted by timestamp
+    points: list[tuple[float, float]]
+
+
+def render_line_chart(
+    series: list[ChartSeries],
+    assets: AssetRegistry,
+    format_value: Callable[[float], str],
+    size: tuple[int, int] = (800, 400),
+) -> bytes:
+    """
+    Draw a time series line chart and encode it as PNG.
+
+    Like the scoreboard, this does blocking Pillow work and should be run in an executor.
+
+    :param series: Lines to draw, with at least one point between them.
+    :param assets: Asset registry to get the font from.
+    :param format_value: Formats the values on the Y axis.
+    :param size: Size of the image.
+    :return: PNG bytes.
+    """
+    width, height = size
+    img = Image.new("RGB", size, BACKGROUND)
+    draw = ImageDraw.Draw(img)
+    font = assets.font(SCOREBOARD_FONT, 14)
+
+    points = [point for line in series for point in line.points]
+    min_x = min(x for x, __ in points)
+    max_x = max(x for x, __ in points)
+    min_y = min(y for __, y in points)
+    max_y = max(y for __, y in points)
+    # Keep flat lines and single points in the middle of the chart
+    if max_x == min_x:
+        min_x, max_x = min_x - 1, max_x + 1
+    if max_y == min_y:
+        min_y, max_y = min_y * 0.9, max_y * 1.1 or 1
+
+    left, top, right, bottom = 90, 40, width - 20, height - 35
+
+    def to_px(x: float, y: float) -> tuple[float, float]:
+        return (
+            left + (x - min_x) / (max_x - min_x) * (right - left),
+            bottom - (y - min_y) / (max_y - min_y) * (bottom - top),
+        )
+
+    for step in range(5):
+        value = min_y + (max_y - min_y) * step / 4
+        __, y = to_px(min_x, value)
+        draw.line([(left, y), (right, y)], GRID)
+        draw.text((left - 8, y), format_value(value), TEXT, font=font, anchor="rm")
+
+    for step in range(5):
+        timestamp = min_x + (max_x - min_x) * step / 4
+        x, __ = to_px(timestamp, min_y)
+        label = datetime.fromtimestamp(timestamp, timezone.utc).strftime("%b %d")
+        draw.text((x, bottom + 8), label, TEXT, font=font, anchor="mt")
+
+    legend_x = left
+    for line in series:
+        color = ImageColor.getcolor(line.color, "RGB")
+        if len(line.points) == 1:
+            x, y = to_px(*line.points[0])
+            draw.ellipse([(x - 3, y - 3), (x + 3, y + 3)], color)
+        else:
+            draw.line([to_px(x, y) for x, y in line.points], color, width=2, joint="curve")
+        draw.rectangle([(legend_x, 14), (legend_x + 12, 26)], color)
+        draw.text((legend_x + 18, 20), line.label, TEXT, font=font, anchor="lm")
+        legend_x += 30 + int(draw.textlength(line.label, font=font))
+
+    img_obj = io.BytesIO()
+    img.save(img_obj, format="PNG")
+    return img_obj.getvalue()
@@ -0,0 +1,44 @@
+from collections.abc import Callable
+
+import discord
+from redbot.core import Config
+from redbot.core.bot import Red
+
+# Which guild settings need to be present for a background loop to have anything to do
+FEATURES: dict[str, Callable[[dict], bool]] = {
+    "scoreboard": lambda data: bool(data["scoreboard_channel"] and data["scoreboard_message"]),
+    "guild_log": lambda data: data["guild_log_channel"] is not None,
+    "countdown": lambda data: data["countdown_channel"] is not None,
+    "auction_house": lambda data: (
+        bool(data["region"] and data["realm"]) and data["region"] != "cn"
+    ),
+}
+
+
+class ConfigSnapshot:
+    """
+    Settings of every guild, read with a single ``all_guilds()`` call.
+
+    Background loops build one of these per tick and only visit the guilds that have
+    the feature they handle set up, instead of awaiting config for every guild the bot
+    is in.
+    """
+
+    def __init__(self, all_guilds: dict[int, dict]):
+        self.guilds = all_guilds
+        self.index: dict[str, list[int]] = {
+            feature: [guild_id for guild_id, data in all_guilds.items() if enabled(data)]
+            for feature, enabled in FEATURES.items()
+        }
+
+    @classmethod
+    async def build(cls, config: Config) -> "ConfigSnapshot":
+        return cls(await config.all_guilds())
+
+    def __getitem__(self, guild_id: int) -> dict:
+        return self.guilds[guild_id]
+
+    def enabled_guilds(self, bot: Red, feature: str) -> list[discord.Guild]:
+        """Guilds the bot is still in that have ``feature`` set up."""
+        guilds = (bot.get_guild(guild_id) for guild_id in self.index[feature])
+        return [guild for guild in guilds if guild is not None]
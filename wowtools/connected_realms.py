@@ -0,0 +1,80 @@
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+
+from aiowowapi import RetailApi
+
+log = logging.getLogger("red.karlo-cogs.wowtools")
+
+
+class ConnectedRealmIndex:
+    """
+    Per-region lookup of realm slugs and localized realm names to connected realm IDs.
+
+    The index is built from a single connected realm search per region, saved to disk,
+    and only rebuilt when it gets old.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._index: dict[str, dict[str, int]] = {}
+        self._updated_at: dict[str, float] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def load(self) -> None:
+        """Load the index saved by a previous run. This blocks."""
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            log.warning("Failed to load the connected realm index.", exc_info=True)
+            return
+        for region, region_data in data.items():
+            self._index[region] = region_data["realms"]
+            self._updated_at[region] = region_data["updated_at"]
+
+    def get(self, region: str, realm: str) -> int | None:
+        """Get the connected realm ID of a realm, by slug or by any localized name."""
+        realms = self._index.get(region.lower(), {})
+        realm = realm.strip().lower()
+        return realms.get(realm) or realms.get(realm.replace(" ", "-"))
+
+    def regions(self) -> list[str]:
+        return list(self._index)
+
+    def stats(self) -> dict[str, int]:
+        return {region: len(realms) for region, realms in self._index.items()}
+
+    def is_stale(self, region: str, max_age: float) -> bool:
+        return time.time() - self._updated_at.get(region.lower(), 0) > max_age
+
+    async def refresh(self, region: str, wow_client: RetailApi) -> None:
+        """Rebuild a region's index from the connected realm search."""
+        region = region.lower()
+        async with self._locks.setdefault(region, asyncio.Lock()):
+            c_realms = await wow_client.GameData.get_connected_realms_search({"_pageSize": 1000})
+            realms: dict[str, int] = {}
+            for result in c_realms["results"]:
+                c_realm_data = result["data"]
+                for realm in c_realm_data["realms"]:
+                    names = {realm["slug"]}
+                    names.update(name.lower() for name in realm["name"].values() if name)
+                    names.update({name.replace(" ", "-") for name in names})
+                    for name in names:
+                        realms[name] = c_realm_data["id"]
+            self._index[region] = realms
+            self._updated_at[region] = time.time()
+            await asyncio.to_thread(self._save)
+
+    def _save(self) -> None:
+        data = {
+            region: {"realms": realms, "updated_at": self._updated_at[region]}
+            for region, realms in self._index.items()
+        }
+        try:
+            self.path.write_text(json.dumps(data), encoding="utf-8")
+        except OSError:
+            log.warning("Failed to save the connected realm index.", exc_info=True)
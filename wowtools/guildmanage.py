@@ -11,7 +11,9 @@ from redbot.core.utils.chat_formatting import humanize_list
 from tabulate import tabulate
 from json import JSONDecodeError
 
+from .config_snapshot import ConfigSnapshot
 from .exceptions import InvalidBlizzardAPI
+from .ratelimit import Priority
 
 _ = Translator("WoWTools", __file__)
 log = logging.getLogger("red.karlo-cogs.wowtools")
@@ -110,26 +112,36 @@ class GuildManage:
         except Exception as e:
             await ctx.send(_("Command failed successfully. {e}").format(e=e))
 
-    async def get_guild_roster(self, guild: discord.Guild) -> dict[str, int]:
+    async def get_guild_roster(
+        self,
+        guild: discord.Guild,
+        settings: dict | None = None,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> dict[str, int]:
         """
         Get guild roster from Blizzard's API.
 
         :param guild:
+        :param settings: The guild's config, if it has already been read
+        :param priority: Whether someone is waiting on the roster
         :return: dict containing guild members and their rank
         """
-        wow_guild_name: str = await self.config.guild(guild).gmanage_guild()
+        if settings is None:
+            settings = await self.config.guild(guild).all()
+        wow_guild_name: str = settings["gmanage_guild"]
         wow_guild_name = wow_guild_name.lower()
-        region: str = await self.config.guild(guild).region()
-        realm: str = await self.config.guild(guild).gmanage_realm()
+        region: str = settings["region"]
+        realm: str = settings["gmanage_realm"]
         realm = realm.lower()
 
         if not self.blizzard.get(region):
             raise InvalidBlizzardAPI
         async with self.blizzard.get(region) as wow_client:
             wow_client = wow_client.Retail
-            guild_roster = await wow_client.Profile.get_guild_roster(
-                name_slug=wow_guild_name, realm_slug=realm
-            )
+            async with self.limiter.limit(region, priority=priority):
+                guild_roster = await wow_client.Profile.get_guild_roster(
+                    name_slug=wow_guild_name, realm_slug=realm
+                )
 
         roster: dict[str, int] = {
             f"{member['character']['name']}:{member['character']['realm']['slug']}": member["rank"]
@@ -188,14 +200,14 @@ class GuildManage:
 
     @tasks.loop(minutes=5)
     async def guild_log(self):
-        for guild in self.bot.guilds:
+        snapshot = await ConfigSnapshot.build(self.config)
+        for guild in snapshot.enabled_guilds(self.bot, "guild_log"):
             if await self.bot.cog_disabled_in_guild(self, guild):
                 continue
             await set_contextual_locales_from_guild(self.bot, guild)
+            settings = snapshot[guild.id]
 
-            guild_log_channel: int = await self.config.guild(guild).guild_log_channel()
-            if guild_log_channel is None:
-                continue
+            guild_log_channel: int = settings["guild_log_channel"]
             guild_log_channel: discord.TextChannel | discord.Thread = guild.get_channel_or_thread(
                 guild_log_channel
             )
@@ -204,7 +216,7 @@ class GuildManage:
 
             log.debug("Comparing guild rosters.")
             try:
-                current_roster = await self.get_guild_roster(guild)
+                current_roster = await self.get_guild_roster(guild, settings, Priority.BULK)
             except InvalidBlizzardAPI:
                 log.warning(
                     "The Blizzard API is not properly set up.\n"
@@ -216,7 +228,7 @@ class GuildManage:
             except (RuntimeError, JSONDecodeError):
                 # blizzard bullshit at the moment, try again later
                 return
-            previous_roster: dict[str, int] = await self.config.guild(guild).guild_roster()
+            previous_roster: dict[str, int] = settings["guild_roster"]
 
             # Have to do this now because the key will include the realm name, meaning comparing
             # means everything in previous will be different and it will send a message for
@@ -0,0 +1,247 @@
+import asyncio
+import bisect
+import itertools
+import json
+import logging
+import time
+from array import array
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+from typing import NamedTuple
+
+from aiowowapi import RetailApi
+from rapidfuzz import fuzz, process
+
+from .ratelimit import WEIGHT_SEARCH, BlizzardLimiter, Priority
+
+log = logging.getLogger("red.karlo-cogs.wowtools")
+
+
+class _Lookup(NamedTuple):
+    # Sorted unique lowercased names, and the items and display name of each
+    keys: list[str]
+    ids: dict[str, list[int]]
+    display: dict[str, str]
+    # Trigram -> indexes into keys of the names containing it
+    trigrams: dict[str, array]
+
+
+class ItemIndex:
+    """
+    Local index of every item's English name, crawled from the item search API.
+
+    Names are kept sorted for prefix lookups, and every name's trigrams are indexed for
+    substring lookups, so resolving an item name never has to call the API.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.updated_at = 0.0
+        self._names: dict[int, str] = {}
+        self._lookup = _Lookup([], {}, {}, {})
+        # Items seen on an auction house, the only ones worth suggesting for price lookups
+        self._tradeable: set[int] = set()
+        self._tradeable_keys: list[str] | None = None
+
+    @property
+    def ready(self) -> bool:
+        return bool(self._lookup.keys)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def load(self) -> None:
+        """Load and index the names saved by a previous crawl. This blocks."""
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            log.warning("Failed to load the item index.", exc_info=True)
+            return
+        self._build({int(item_id): name for item_id, name in data["names"].items()})
+        self.updated_at = data["updated_at"]
+
+    def find(self, query: str) -> dict[int, str]:
+        """
+        Resolve a name the way a user would type it.
+
+        An exact match wins, then the shortest name starting with the query, then the
+        shortest name containing it.
+
+        :param query: Item name, or part of it.
+        :return: Every item ID with the matched name, mapped to that name.
+        """
+        lookup = self._lookup
+        key = query.strip().lower()
+        if key not in lookup.ids:
+            matches = self.search(key, limit=None)
+            if not matches:
+                return {}
+            key = min(matches, key=len).lower()
+        return {item_id: lookup.display[key] for item_id in lookup.ids[key]}
+
+    def search(
+        self, query: str, limit: int | None = 25, keep: Callable[[str], bool] | None = None
+    ) -> list[str]:
+        """
+        Get item names matching a query, names starting with it first.
+
+        :param query: Part of an item name.
+        :param limit: Maximum amount of names to return, or None for all of them.
+        :param keep: Only return names for which this returns True, given the lowercased name.
+        :return: Display names of the matching items.
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+        lookup = self._lookup
+        keys = lookup.keys
+        start = bisect.bisect_left(keys, query)
+        # Every name with this prefix sorts before the prefix followed by the highest character
+        end = bisect.bisect_left(keys, query + "\uffff", lo=start)
+        prefixed = (keys[i] for i in range(start, end))
+
+        matches: dict[str, None] = {}
+        for key in itertools.chain(prefixed, self._containing(lookup, query)):
+            if key in matches or (keep is not None and not keep(key)):
+                continue
+            matches[key] = None
+            if limit is not None and len(matches) >= limit:
+                break
+        return [lookup.display[key] for key in matches]
+
+    def complete(self, query: str, limit: int = 25) -> list[str]:
+        """
+        Suggest item names for autocomplete.
+
+        Once any auction house has been seen, only items listed on one are suggested.
+        Prefix and substring matches come first, and fuzzy matches fill up the rest so
+        typos still find something.
+
+        :param query: What the user typed so far.
+        :param limit: Maximum amount of names to return.
+        :return: Display names of the suggested items.
+        """
+        lookup = self._lookup
+        tradeable = self._tradeable
+        keep = None
+        if tradeable:
+
+            def keep(key: str) -> bool:
+                return any(item_id in tradeable for item_id in lookup.ids[key])
+
+        names = self.search(query, limit, keep)
+        query = query.strip().lower()
+        if len(names) >= limit or len(query) < 3:
+            return names
+
+        found = {name.lower() for name in names}
+        choices = self._get_tradeable_keys(lookup) if tradeable else lookup.keys
+        for key, __, __ in process.extract(
+            query, choices, scorer=fuzz.QRatio, limit=limit, score_cutoff=80
+        ):
+            if key not in found:
+                names.append(lookup.display[key])
+                if len(names) >= limit:
+                    break
+        return names
+
+    def mark_tradeable(self, item_ids: Iterable[int]) -> None:
+        """Remember items that were listed on an auction house."""
+        size = len(self._tradeable)
+        self._tradeable.update(item_ids)
+        if len(self._tradeable) != size:
+            self._tradeable_keys = None
+
+    def _get_tradeable_keys(self, lookup: _Lookup) -> list[str]:
+        if self._tradeable_keys is None:
+            names = self._names
+            keys = {names[item_id].lower() for item_id in self._tradeable if item_id in names}
+            self._tradeable_keys = sorted(key for key in keys if key in lookup.ids)
+        return self._tradeable_keys
+
+    @staticmethod
+    def _containing(lookup: _Lookup, query: str) -> Iterator[str]:
+        if len(query) < 3:
+            return (key for key in lookup.keys if query in key)
+        # Any name containing the query contains each of its trigrams, so only the names
+        # with its rarest trigram need to be checked
+        postings = [lookup.trigrams.get(query[i : i + 3]) for i in range(len(query) - 2)]
+        if any(posting is None for posting in postings):
+            return iter(())
+        rarest = min(postings, key=len)
+        return (lookup.keys[i] for i in rarest if query in lookup.keys[i])
+
+    async def update(self, wow_client: RetailApi, limiter: BlizzardLimiter, region: str) -> int:
+        """
+        Crawl items that are newer than the newest indexed item.
+
+        The search API can't page past a certain depth, so the crawl walks ID ranges
+        instead of paging through a single search. Items crawled before a failure are
+        still indexed and saved, so the next crawl resumes after them.
+
+        :return: Amount of new items.
+        """
+        names = dict(self._names)
+        next_id = max(names, default=0) + 1
+        added = 0
+        try:
+            while True:
+                async with limiter.limit(region, WEIGHT_SEARCH, Priority.BULK):
+                    page = await wow_client.GameData.get_item_search(
+                        {"id": f"[{next_id},]", "orderby": "id", "_pageSize": 1000}
+                    )
+                results = page.get("results", [])
+                if not results:
+                    break
+                page_start = next_id
+                for result in results:
+                    item_id = result["data"]["id"]
+                    name = result["data"]["name"].get("en_US")
+                    if name:
+                        names[item_id] = name
+                        added += 1
+                    next_id = max(next_id, item_id + 1)
+                if next_id == page_start:
+                    # Asking again would return the same page forever
+                    log.warning(
+                        f"The item search ignored the ID range from {next_id}, stopping the crawl."
+                    )
+                    break
+        finally:
+            if added or not self.ready:
+                await asyncio.to_thread(self._build, names)
+            self.updated_at = time.time()
+            await asyncio.to_thread(self._save, names)
+        return added
+
+    def _build(self, names: dict[int, str]) -> None:
+        start = time.perf_counter()
+        ids: dict[str, list[int]] = {}
+        display: dict[str, str] = {}
+        for item_id, name in sorted(names.items()):
+            key = name.lower()
+            ids.setdefault(key, []).append(item_id)
+            display.setdefault(key, name)
+        keys = sorted(ids)
+        trigrams: dict[str, array] = {}
+        for index, key in enumerate(keys):
+            for trigram in {key[i : i + 3] for i in range(len(key) - 2)}:
+                posting = trigrams.get(trigram)
+                if posting is None:
+                    posting = trigrams[trigram] = array("I")
+                posting.append(index)
+        # Swapped in as one object since lookups can happen while this runs in a thread
+        self._lookup = _Lookup(keys, ids, display, trigrams)
+        self._names = names
+        self._tradeable_keys = None
+        log.debug(f"Indexed {len(names)} items in {(time.perf_counter() - start) * 1000:.0f}ms.")
+
+    def _save(self, names: dict[int, str]) -> None:
+        try:
+            self.path.write_text(
+                json.dumps({"names": names, "updated_at": self.updated_at}), encoding="utf-8"
+            )
+        except OSError:
+            log.warning("Failed to save the item index.", exc_info=True)
@@ -0,0 +1,41 @@
+from typing import NamedTuple
+
+
+class LeaderboardEntry(NamedTuple):
+    rank: int
+    rating: int
+
+
+class Leaderboard:
+    """
+    A PvP bracket leaderboard indexed by character.
+
+    Leaderboards have thousands of entries, so they are indexed once when fetched
+    instead of scanned on every lookup.
+    """
+
+    def __init__(self, entries: dict[tuple[str, str], LeaderboardEntry]):
+        self._entries = entries
+
+    @classmethod
+    def from_response(cls, data: dict) -> "Leaderboard":
+        """Index a leaderboard response from the Blizzard API."""
+        entries = {}
+        for entry in data.get("entries", []):
+            character = entry["character"]
+            key = (character["name"].lower(), character["realm"]["slug"])
+            entries[key] = LeaderboardEntry(entry["rank"], entry["rating"])
+        return cls(entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, name: str, realm_slug: str) -> LeaderboardEntry | None:
+        """
+        Look up a character's standing.
+
+        :param name: Character name, in any case.
+        :param realm_slug: Slug of the character's realm.
+        :return: The character's entry, or None if they aren't on the leaderboard.
+        """
+        return self._entries.get((name.lower(), realm_slug))
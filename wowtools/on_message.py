@@ -10,6 +10,7 @@ from PIL import Image
 from redbot.core import commands
 
 from wowtools.exceptions import InvalidBlizzardAPI
+from wowtools.ratelimit import WEIGHT_SEARCH
 
 log = logging.getLogger("red.karlo-cogs.wowtools")
 
@@ -110,8 +111,9 @@ class OnMessage:
             obj_type = method[3]
 
             try:
-                await self.limiter.acquire()
-                search_results = await search_method(search_params)
+                # Messages are always searched in the US region, see get_embeds
+                async with self.limiter.limit("us", WEIGHT_SEARCH):
+                    search_results = await search_method(search_params)
             except ClientResponseError:
                 continue
 
@@ -137,8 +139,10 @@ class OnMessage:
         return embed
 
     async def make_embed(self, description_method, media_method, result, obj_type):
-        result_description = await description_method(result["data"]["id"])
-        result_icon = await media_method(result["data"]["id"])
+        async with self.limiter.limit("us"):
+            result_description = await description_method(result["data"]["id"])
+        async with self.limiter.limit("us"):
+            result_icon = await media_method(result["data"]["id"])
         embed = discord.Embed(
             title=result["data"]["name"]["en_US"],
             description=self.generate_description(result_description, obj_type),
@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from .auction_snapshots import AuctionSnapshot
+
+log = logging.getLogger("red.karlo-cogs.wowtools")
+
+HOUR = 60 * 60
+DAY = HOUR * 24
+# Hourly points are kept this long before being merged into one point per day
+HOURLY_RETENTION = DAY * 7
+DAILY_RETENTION = DAY * 365
+
+
+class PricePoint(NamedTuple):
+    timestamp: int
+    min_price: int
+    median_price: int
+    quantity: int
+
+
+class TokenQuote(NamedTuple):
+    # When Blizzard last updated the price, as a unix timestamp
+    timestamp: int
+    price: int
+
+
+class PriceHistory:
+    """
+    Min, median and quantity of every item per auction snapshot, kept in SQLite.
+
+    Snapshots are appended once per hour. Points older than ``HOURLY_RETENTION`` are merged
+    into one point per day by ``compact``, which keeps the lowest min and the average
+    median and quantity of that day.
+
+    WoW Token quotes are kept alongside, one row per price update. Blizzard only updates
+    the price every 20 minutes, so they are small enough to never need merging.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(
+                """
+                PRAGMA journal_mode = WAL;
+                CREATE TABLE IF NOT EXISTS prices (
+                    region TEXT NOT NULL,
+                    realm INTEGER NOT NULL,
+                    item_id INTEGER NOT NULL,
+                    ts INTEGER NOT NULL,
+                    min_price INTEGER NOT NULL,
+                    median_price INTEGER NOT NULL,
+                    quantity INTEGER NOT NULL,
+                    PRIMARY KEY (region, realm, item_id, ts)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS tokens (
+                    region TEXT NOT NULL,
+                    ts INTEGER NOT NULL,
+                    price INTEGER NOT NULL,
+                    PRIMARY KEY (region, ts)
+                ) WITHOUT ROWID;
+                """
+            )
+        return self._conn
+
+    async def record(self, region: str, c_realm_id: int, snapshot: AuctionSnapshot) -> None:
+        """Append a snapshot. Recording the same hour twice keeps the later snapshot."""
+        await asyncio.to_thread(self._record, region, c_realm_id, snapshot)
+
+    async def get(
+        self, region: str, c_realm_id: int, item_ids: list[int], since: float
+    ) -> list[PricePoint]:
+        """
+        Get the history of items, combining items that share a name.
+
+        :param region: Region of the realm.
+        :param c_realm_id: Connected realm ID, or ``COMMODITIES``.
+        :param item_ids: Item IDs to get the history of.
+        :param since: Unix timestamp of the oldest point to get.
+        :return: Points sorted from oldest to newest.
+        """
+        return await asyncio.to_thread(self._get, region, c_realm_id, item_ids, since)
+
+    async def record_token(self, region: str, quote: TokenQuote) -> None:
+        """Append a WoW Token quote. Recording the same update twice is a no-op."""
+        await asyncio.to_thread(self._record_token, region, quote)
+
+    async def get_token(self, region: str, since: float) -> list[TokenQuote]:
+        """
+        Get the WoW Token price history of a region.
+
+        :param region: Region of the token.
+        :param since: Unix timestamp of the oldest quote to get.
+        :return: Quotes sorted from oldest to newest.
+        """
+        return await asyncio.to_thread(self._get_token, region, since)
+
+    async def compact(self) -> None:
+        await asyncio.to_thread(self._compact)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _record(self, region: str, c_realm_id: int, snapshot: AuctionSnapshot) -> None:
+        item_ids, mins, medians, quantities = snapshot.summary()
+        # Hourly points sit in the middle of their hour, so they can never be mistaken for
+        # the daily points that compact leaves at midnight
+        ts = int(snapshot.fetched_at) // HOUR * HOUR + HOUR // 2
+        rows = zip(
+            [region] * len(item_ids),
+            [c_realm_id] * len(item_ids),
+            item_ids.tolist(),
+            [ts] * len(item_ids),
+            mins.tolist(),
+            medians.tolist(),
+            quantities.tolist(),
+        )
+        start = time.perf_counter()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+                )
+        log.debug(
+            f"Recorded {len(item_ids)} prices of {c_realm_id} ({region}) "
+            f"in {(time.perf_counter() - start) * 1000:.0f}ms."
+        )
+
+    def _get(
+        self, region: str, c_realm_id: int, item_ids: list[int], since: float
+    ) -> list[PricePoint]:
+        placeholders = ", ".join("?" * len(item_ids))
+        with self._lock:
+            rows = (
+                self._connect()
+                .execute(
+                    f"""
+                    SELECT ts, MIN(min_price), CAST(AVG(median_price) AS INTEGER), SUM(quantity)
+                    FROM prices
+                    WHERE region = ? AND realm = ? AND item_id IN ({placeholders}) AND ts >= ?
+                    GROUP BY ts
+                    ORDER BY ts
+                    """,
+                    (region, c_realm_id, *item_ids, int(since)),
+                )
+                .fetchall()
+            )
+        return [PricePoint(*row) for row in rows]
+
+    def _record_token(self, region: str, quote: TokenQuote) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("INSERT OR IGNORE INTO tokens VALUES (?, ?, ?)", (region, *quote))
+
+    def _get_token(self, region: str, since: float) -> list[TokenQuote]:
+        with self._lock:
+            rows = (
+                self._connect()
+                .execute(
+                    "SELECT ts, price FROM tokens WHERE region = ? AND ts >= ? ORDER BY ts",
+                    (region, int(since)),
+                )
+                .fetchall()
+            )
+        return [TokenQuote(*row) for row in rows]
+
+    def _compact(self) -> None:
+        now = int(time.time())
+        # Only whole days are merged, so each day is merged once and stays a single point
+        cutoff = (now - HOURLY_RETENTION) // DAY * DAY
+        start = time.perf_counter()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                merged = conn.execute(
+                    """
+                    INSERT OR REPLACE INTO prices
+                    SELECT region, realm, item_id, ts - ts % :day, MIN(min_price),
+                        CAST(AVG(median_price) AS INTEGER), CAST(AVG(quantity) AS INTEGER)
+                    FROM prices
+                    WHERE ts < :cutoff AND ts % :day != 0
+                    GROUP BY region, realm, item_id, ts - ts % :day
+                    """,
+                    {"day": DAY, "cutoff": cutoff},
+                ).rowcount
+                conn.execute(
+                    "DELETE FROM prices WHERE ts < :cutoff AND ts % :day != 0",
+                    {"day": DAY, "cutoff": cutoff},
+                )
+                conn.execute("DELETE FROM prices WHERE ts < ?", (now - DAILY_RETENTION,))
+                conn.execute("DELETE FROM tokens WHERE ts < ?", (now - DAILY_RETENTION,))
+        log.debug(f"Merged {merged} daily prices in {(time.perf_counter() - start) * 1000:.0f}ms.")
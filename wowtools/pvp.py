@@ -1,16 +1,26 @@
-from typing import List, Optional
+import asyncio
+import functools
+import logging
+from collections.abc import Awaitable
+from typing import Any, List
 
 import discord
-from aiohttp import ClientResponseError
+from aiohttp import ClientError, ClientResponseError
 from aiowowapi import RetailApi
 from discord import app_commands
 from redbot.core import commands
 from redbot.core.i18n import Translator, set_contextual_locales_from_guild
 
-from wowtools.utils import get_realms
+from wowtools.leaderboards import Leaderboard
+from wowtools.ratelimit import WEIGHT_SEARCH
+from wowtools.realm_index import REALM_INDEX
 
+log = logging.getLogger("red.karlo-cogs.wowtools")
 _ = Translator("WoWTools", __file__)
 
+# Seconds to wait for the character's details before answering with what arrived
+RATING_LATENCY_BUDGET = 8
+
 
 class PvP:
     @commands.cooldown(rate=1, per=5, type=commands.BucketType.user)
@@ -54,68 +64,62 @@ class PvP:
         async with api_client:
             wow_client = api_client.Retail
             try:
-                await self.limiter.acquire()
-                profile = await wow_client.Profile.get_character_profile_summary(
-                    character_name=character, realm_slug=realm
-                )
+                async with self.limiter.limit(region):
+                    profile = await wow_client.Profile.get_character_profile_summary(
+                        character_name=character, realm_slug=realm
+                    )
             except ClientResponseError:
                 await ctx.send(
                     _('Character "{character_name}" not found.').format(character_name=character)
                 )
                 return
+            if "name" not in profile:
+                await ctx.send(_("That character or realm does not exist."))
+                return
 
-            await self.limiter.acquire()
-            achievements = await wow_client.Profile.get_character_achievements_summary(
-                character_name=character, realm_slug=realm
+            # Everything else only needs the character to exist, so it's fetched at once
+            results = await self.fetch_concurrently(
+                {
+                    "achievements": self.limiter.run(
+                        region,
+                        wow_client.Profile.get_character_achievements_summary(
+                            character_name=character, realm_slug=realm
+                        ),
+                    ),
+                    "media": self.limiter.run(
+                        region,
+                        wow_client.Profile.get_character_media_summary(
+                            character_name=character, realm_slug=realm
+                        ),
+                    ),
+                    **{
+                        bracket: self.limiter.run(
+                            region,
+                            wow_client.Profile.get_character_pvp_bracket_statistics(
+                                character_name=character,
+                                realm_slug=realm,
+                                pvp_bracket=bracket,
+                            ),
+                        )
+                        for bracket in ("rbg", "2v2", "3v3")
+                    },
+                    "shuffle": self.get_shuffle_leaderboard(region, wow_client, profile),
+                },
+                RATING_LATENCY_BUDGET,
             )
 
-            await self.limiter.acquire()
-            media = await wow_client.Profile.get_character_media_summary(
-                character_name=character, realm_slug=realm
-            )
-
-            try:
-                await self.limiter.acquire()
-                rbg_statistics = await wow_client.Profile.get_character_pvp_bracket_statistics(
-                    character_name=character,
-                    realm_slug=realm,
-                    pvp_bracket="rbg",
-                )
-            except ClientResponseError:
-                rbg_statistics = {}
-            try:
-                await self.limiter.acquire()
-                duo_statistics = await wow_client.Profile.get_character_pvp_bracket_statistics(
-                    character_name=character,
-                    realm_slug=realm,
-                    pvp_bracket="2v2",
-                )
-            except ClientResponseError:
-                duo_statistics = {}
-            try:
-                await self.limiter.acquire()
-                tri_statistics = await wow_client.Profile.get_character_pvp_bracket_statistics(
-                    character_name=character,
-                    realm_slug=realm,
-                    pvp_bracket="3v3",
-                )
-            except ClientResponseError:
-                tri_statistics = {}
-            try:
-                await self.limiter.acquire()
-                shuffle_rating = await self.get_shuffle_rating(wow_client, profile)
-                await self.limiter.acquire()
-                shuffle_rank = await self.get_shuffle_rank(wow_client, profile)
-            except ClientResponseError:
-                shuffle_rating = None
-                shuffle_rank = None
-
-        if "name" not in profile:
-            await ctx.send(_("That character or realm does not exist."))
-            return
+        achievements = results.get("achievements", {"achievements": []})
+        media = results.get("media")
+        rbg_statistics = results.get("rbg", {})
+        duo_statistics = results.get("2v2", {})
+        tri_statistics = results.get("3v3", {})
+        shuffle = None
+        if "shuffle" in results:
+            shuffle = results["shuffle"].get(profile["name"], profile["realm"]["slug"])
+        shuffle_rating = shuffle.rating if shuffle else None
+        shuffle_rank = self.format_rank(shuffle.rank) if shuffle else None
 
         real_char_name: str = profile["name"]
-        char_img_url: str = media["assets"][0]["value"]
         char_race: str = profile["race"]["name"]
         char_class: str = profile["character_class"]["name"]
         char_faction: str = profile["faction"]["name"]
@@ -208,7 +212,8 @@ class PvP:
             description=f"{char_race} {char_class}",
             url=f"https://worldofwarcraft.com/en-gb/character/{region}/{realm}/{real_char_name}",
         )
-        embed.set_thumbnail(url=char_img_url)
+        if media:
+            embed.set_thumbnail(url=media["assets"][0]["value"])
         embed.add_field(name=_("RBG Rating"), value=rbg_rating)
         embed.add_field(name=_("2v2 Rating"), value=duo_rating)
         embed.add_field(name=_("3v3 Rating"), value=tri_rating)
@@ -227,10 +232,7 @@ class PvP:
             embed.add_field(name=_("Achievements"), value="\n".join(achi_to_post), inline=False)
 
         details_url = (
-            f"https://check-pvp.fr/"
-            f"{region}/"
-            f"{realm.capitalize()}/"
-            f"{character.capitalize()}"
+            f"https://check-pvp.fr/{region}/{realm.capitalize()}/{character.capitalize()}"
         )
         view = discord.ui.View()
         view.add_item(
@@ -245,43 +247,49 @@ class PvP:
     async def rating_realm_autocomplete(
         self, interaction: discord.Interaction, current: str
     ) -> List[app_commands.Choice[str]]:
-        realms = await get_realms(current)
-        return realms[:25]
+        return REALM_INDEX.search(current)
 
     @staticmethod
-    async def get_shuffle_rating(wow_client: RetailApi, profile: dict) -> Optional[int]:
-        leaderboard = await PvP.get_shuffle_leaderboard(wow_client, profile)
-        return next(
-            (
-                entry["rating"]
-                for entry in leaderboard["entries"]
-                if entry["character"]["name"] == profile["name"]
-            ),
-            None,
-        )
+    async def fetch_concurrently(requests: dict[str, Awaitable], timeout: float) -> dict[str, Any]:
+        """
+        Make independent API requests at the same time.
 
-    @staticmethod
-    async def get_shuffle_rank(wow_client: RetailApi, profile: dict) -> str | None:
-        leaderboard = await PvP.get_shuffle_leaderboard(wow_client, profile)
-        rank: int | None = next(
-            (
-                entry["rank"]
-                for entry in leaderboard["entries"]
-                if entry["character"]["name"] == profile["name"]
-            ),
-            None,
-        )
-        if not rank:
-            return None
+        A request that fails or doesn't finish in time is left out of the results, so one
+        slow or missing endpoint doesn't hold up or break the rest.
+
+        :param requests: Request coroutines by name, already rate limited.
+        :param timeout: Seconds to wait for all of them.
+        :return: Responses of the successful requests by name.
+        """
+        tasks = {name: asyncio.ensure_future(request) for name, request in requests.items()}
+        __, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        # Let the cancelled requests finish before the caller closes the session
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        results = {}
+        for name, task in tasks.items():
+            if task in pending:
+                log.debug(f"{name} request didn't finish in {timeout}s, skipping it.")
+            elif isinstance(task.exception(), (ClientError, asyncio.TimeoutError)):
+                log.debug(f"{name} request failed, skipping it: {task.exception()}")
+            else:
+                results[name] = task.result()
+        return results
 
+    @staticmethod
+    def format_rank(rank: int) -> str:
         if 11 <= (rank % 100) <= 13:
             suffix = "th"
         else:
             suffix = ["th", "st", "nd", "rd", "th"][min(rank % 10, 4)]
         return str(rank) + suffix
 
-    @staticmethod
-    async def get_shuffle_leaderboard(wow_client: RetailApi, profile: dict):
+    async def get_shuffle_leaderboard(
+        self, region: str, wow_client: RetailApi, profile: dict
+    ) -> Leaderboard:
+        """Get the Solo Shuffle leaderboard of the character's spec in the current season."""
         char_class: str = profile["character_class"]["name"]
         char_class = char_class.lower().replace(" ", "")
 
@@ -289,7 +297,31 @@ class PvP:
         char_spec = char_spec.lower().replace(" ", "")
 
         pvp_bracket = f"shuffle-{char_class}-{char_spec}"
-        return await wow_client.GameData.get_pvp_leaderboard(
-            pvp_season_id=34,
-            pvp_bracket=pvp_bracket,
+        season_id = await self.get_pvp_season(region, wow_client)
+        return await self.pvp_leaderboards.get(
+            (region, season_id, pvp_bracket),
+            functools.partial(
+                self._fetch_pvp_leaderboard, region, wow_client, season_id, pvp_bracket
+            ),
+        )
+
+    async def _fetch_pvp_leaderboard(
+        self, region: str, wow_client: RetailApi, season_id: int, pvp_bracket: str
+    ) -> Leaderboard:
+        async with self.limiter.limit(region, WEIGHT_SEARCH):
+            data = await wow_client.GameData.get_pvp_leaderboard(
+                pvp_season_id=season_id,
+                pvp_bracket=pvp_bracket,
+            )
+        return Leaderboard.from_response(data)
+
+    async def get_pvp_season(self, region: str, wow_client: RetailApi) -> int:
+        """Get the ID of the region's current PvP season."""
+        return await self.pvp_seasons.get(
+            region, functools.partial(self._fetch_pvp_season, region, wow_client)
         )
+
+    async def _fetch_pvp_season(self, region: str, wow_client: RetailApi) -> int:
+        async with self.limiter.limit(region):
+            seasons = await wow_client.GameData.get_pvp_seasons_index()
+        return seasons["current_season"]["id"]
@@ -12,6 +12,31 @@ from redbot.core.utils.views import _ACCEPTABLE_PAGE_TYPES, SimpleMenu
 log = logging.getLogger("red.karlo-cogs.wowtools")
 _ = Translator("WoWTools", __file__)
 
+PROFILE_FIELDS = (
+    "mythic_plus_scores_by_season:current",
+    "raid_progression",
+    "gear",
+    "mythic_plus_best_runs",
+    "talents",
+    "guild",
+)
+# Raider.io re-crawls active characters more often, so a recently crawled profile is kept
+# for less time than one that hasn't been crawled in a while
+PROFILE_MIN_TTL = 60 * 5
+PROFILE_MAX_TTL = 60 * 60
+# How long after its TTL a profile is still shown while a fresh one is fetched
+PROFILE_MAX_STALE = 60 * 60 * 24
+
+
+def profile_ttl(profile: dict) -> float:
+    """Seconds a Raider.io profile stays fresh, going by when Raider.io last crawled it."""
+    crawled_at = profile.get("last_crawled_at")
+    if not crawled_at:
+        # Errors like unknown characters have no crawl time and aren't cached
+        return 0
+    age = (datetime.now(timezone.utc) - isoparse(crawled_at)).total_seconds()
+    return min(max(age / 2, PROFILE_MIN_TTL), PROFILE_MAX_TTL)
+
 
 class Raiderio:
     """Cog for interaction with the raider.io API"""
@@ -58,19 +83,7 @@ class Raiderio:
         region = region.lower()
         if ctx.interaction:
             await ctx.defer()
-        profile_data = await self.raiderio_api.get_character_profile(
-            region,
-            realm,
-            character,
-            fields=[
-                "mythic_plus_scores_by_season:current",
-                "raid_progression",
-                "gear",
-                "mythic_plus_best_runs",
-                "talents",
-                "guild",
-            ],
-        )
+        profile_data = await self.get_raiderio_profile(region, realm, character)
 
         try:
             char_name = profile_data["name"]
@@ -322,8 +335,7 @@ class Raiderio:
     # async def raiderio_guild_realm_autocomplete(
     #     self, interaction: discord.Interaction, current: str
     # ) -> List[app_commands.Choice[str]]:
-    #     realms = await get_realms(current)
-    #     return realms[:25]
+    #     return REALM_INDEX.search(current)
 
     @raiderio.command(name="affixes")
     @commands.guild_only()
@@ -392,6 +404,20 @@ class Raiderio:
     #         if current.lower() in region.lower()
     #     ][:25]
 
+    async def get_raiderio_profile(self, region: str, realm: str, character: str) -> dict:
+        """
+        Get a character's Raider.io profile with the fields the profile commands show.
+
+        A stale profile is returned right away and refreshed in the background.
+        """
+        key = (region.lower(), realm.lower(), character.lower(), PROFILE_FIELDS)
+        return await self.raiderio_profiles.get(
+            key,
+            lambda: self.raiderio_api.get_character_profile(
+                region, realm, character, fields=list(PROFILE_FIELDS)
+            ),
+        )
+
     @staticmethod
     def parse_date(tz_date) -> str:
         parsed = isoparse(tz_date) + timedelta(hours=2)
@@ -0,0 +1,172 @@
+import asyncio
+import inspect
+import logging
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator, Awaitable, Mapping
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import TypeVar
+
+import aiohttp
+
+log = logging.getLogger("red.karlo-cogs.wowtools")
+
+T = TypeVar("T")
+
+# Blizzard counts every request the same towards the hourly quota, but the search and
+# auction house endpoints are much heavier to serve, so they take more of the per-second
+# budget to keep them spaced out
+WEIGHT_DEFAULT = 1
+WEIGHT_SEARCH = 2
+WEIGHT_AUCTIONS = 10
+WEIGHT_COMMODITIES = 25
+
+# How long to back off after a 429 that came without a Retry-After header
+DEFAULT_RETRY_AFTER = 1.0
+
+
+class Priority(IntEnum):
+    # Someone is waiting for a response to a command
+    INTERACTIVE = 0
+    # Background work like auction snapshots, index crawls and roster polls
+    BULK = 1
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, amount: float, now: float, reserve: float = 0) -> float:
+        """Seconds until ``amount`` tokens can be taken while leaving ``reserve`` behind."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return max(0.0, (amount + reserve - self.tokens) / self.rate)
+
+
+class BlizzardLimiter:
+    """
+    Rate limits for Blizzard API requests.
+
+    Every regional host gets its own per-second token bucket. The hourly quota is counted
+    per API client, so a single bucket is shared by all regions.
+
+    Bulk requests wait while interactive requests are queued for the same region, and
+    can't spend the part of the hourly quota that is reserved for interactive requests.
+    A 429 response pauses its region for as long as the response's Retry-After asks.
+    """
+
+    def __init__(
+        self, rate: int = 100, hourly_quota: int = 36000, interactive_reserve: float = 0.1
+    ):
+        self.rate = rate
+        self.throttled = 0
+        self._regions: dict[str, _TokenBucket] = {}
+        self._hourly = _TokenBucket(hourly_quota / 3600, hourly_quota)
+        self._reserve = hourly_quota * interactive_reserve
+        self._paused_until: dict[str, float] = {}
+        self._interactive_waiting: dict[str, int] = defaultdict(int)
+
+    async def acquire(
+        self,
+        region: str,
+        weight: int = WEIGHT_DEFAULT,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> None:
+        """
+        Wait until a request can be made.
+
+        :param region: Region whose host the request goes to.
+        :param weight: Cost of the request, one of the ``WEIGHT_`` constants.
+        :param priority: Whether someone is waiting on the request.
+        """
+        region = region.lower()
+        bucket = self._regions.get(region)
+        if bucket is None:
+            bucket = self._regions[region] = _TokenBucket(self.rate, self.rate)
+        bulk = priority is Priority.BULK
+        if not bulk:
+            self._interactive_waiting[region] += 1
+        try:
+            while True:
+                now = time.monotonic()
+                if bulk and self._interactive_waiting[region]:
+                    # Let the queued interactive requests go first
+                    wait = weight / self.rate
+                else:
+                    wait = max(
+                        self._paused_until.get(region, 0) - now,
+                        bucket.wait_time(weight, now),
+                        self._hourly.wait_time(1, now, self._reserve if bulk else 0),
+                    )
+                if wait <= 0:
+                    bucket.tokens -= weight
+                    self._hourly.tokens -= 1
+                    return
+                await asyncio.sleep(wait)
+        finally:
+            if not bulk:
+                self._interactive_waiting[region] -= 1
+
+    @asynccontextmanager
+    async def limit(
+        self,
+        region: str,
+        weight: int = WEIGHT_DEFAULT,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> AsyncIterator[None]:
+        """
+        Wait until a request can be made, and back off if it gets rate limited.
+
+        The request has to be made inside the ``async with`` block.
+        """
+        await self.acquire(region, weight, priority)
+        try:
+            yield
+        except aiohttp.ClientResponseError as e:
+            if e.status == 429:
+                self.back_off(region, e.headers)
+            raise
+
+    async def run(
+        self,
+        region: str,
+        request: Awaitable[T],
+        weight: int = WEIGHT_DEFAULT,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> T:
+        """Make a request once it can be made, for requests that are passed around."""
+        try:
+            async with self.limit(region, weight, priority):
+                return await request
+        finally:
+            # Don't leave the request unawaited if the wait was cancelled
+            if inspect.iscoroutine(request):
+                request.close()
+
+    def back_off(self, region: str, headers: Mapping[str, str] | None = None) -> None:
+        """Pause a region after a 429 response."""
+        retry_after = DEFAULT_RETRY_AFTER
+        if headers and headers.get("Retry-After"):
+            try:
+                retry_after = float(headers["Retry-After"])
+            except ValueError:
+                pass
+        self.throttled += 1
+        region = region.lower()
+        self._paused_until[region] = max(
+            self._paused_until.get(region, 0), time.monotonic() + retry_after
+        )
+        log.warning(f"Rate limited by the Blizzard API in {region}, pausing for {retry_after}s.")
+
+    def stats(self) -> dict[str, int]:
+        now = time.monotonic()
+        self._hourly.wait_time(0, now)
+        return {
+            "hourly quota left": int(self._hourly.tokens),
+            "throttled": self.throttled,
+            "paused regions": sum(until > now for until in self._paused_until.values()),
+        }
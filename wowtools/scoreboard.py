@@ -1,25 +1,42 @@
+import asyncio
+import functools
+import hashlib
+import heapq
 import io
+import json
 import logging
+import time
 from datetime import datetime, timezone
 from enum import Enum
-from typing import List, Optional
+from typing import List, NamedTuple, Optional
 
 import discord
 from aiohttp import ClientResponseError
+from dateutil.parser import isoparse
 from discord.ext import tasks
-from PIL import Image, ImageColor, ImageDraw, ImageFilter, ImageFont
 from redbot.core import commands
-from redbot.core.data_manager import bundled_data_path
 from redbot.core.i18n import Translator, set_contextual_locales_from_guild
 from redbot.core.utils.chat_formatting import box, humanize_list, humanize_number
 from tabulate import tabulate
 
+from wowtools.config_snapshot import ConfigSnapshot
 from wowtools.exceptions import InvalidBlizzardAPI
+from wowtools.ratelimit import Priority
+from wowtools.scoreboard_image import ImageRow, render_scoreboard
+from wowtools.utils import gather_bounded
 
 log = logging.getLogger("red.karlo-cogs.wowtools")
 _ = Translator("WoWTools", __file__)
 
 DEV_GUILDS = [362298824854863882, 133049272517001216]
+# Seconds a single scoreboard tick may take before unfinished guilds are skipped
+SCOREBOARD_TICK_BUDGET = 270
+# Seconds a guild's rankings have to stay the same before they're sent to Assistant
+ASSISTANT_EMBEDDING_DEBOUNCE = 120
+# Raider.io's ID for the current expansion, used to look up the running Mythic+ season
+RAIDERIO_EXPANSION_ID = 11
+# Mythic+ was added in Legion, there are no seasons to find before it
+RAIDERIO_FIRST_MPLUS_EXPANSION_ID = 6
 
 
 class Scoreboard:
@@ -107,6 +124,7 @@ class Scoreboard:
                 )
             await self.config.guild(ctx.guild).scoreboard_channel.clear()
             await self.config.guild(ctx.guild).scoreboard_message.clear()
+            await self.config.guild(ctx.guild).scoreboard_fingerprint.clear()
             await ctx.send(_("Scoreboard channel cleared."))
             return
         if (
@@ -140,6 +158,8 @@ class Scoreboard:
         else:
             sb_msg = await channel.send(embed=embed)
         await self.config.guild(ctx.guild).scoreboard_message.set(sb_msg.id)
+        # The new message was made without the tick's cutoff line, let the next tick redo it
+        await self.config.guild(ctx.guild).scoreboard_fingerprint.clear()
         await ctx.send(_("Scoreboard channel set."))
 
     @sbset.group(name="blacklist", aliases=["blocklist"])
@@ -280,9 +300,8 @@ class Scoreboard:
             )
             desc += formatted_rankings
 
-        ass_integration = await self.config.assistant_cog_integration()
-        if (assistant := self.bot.get_cog("Assistant")) and ass_integration:
-            await self.add_assistant_embedding(assistant, ctx.guild, image, tabulate_list)
+        if await self.config.assistant_cog_integration():
+            self.queue_assistant_embedding(ctx.guild, image, tabulate_list)
 
         embed.description = desc
 
@@ -305,117 +324,215 @@ class Scoreboard:
 
         await self.config.guild(ctx.guild).scoreboard_channel.clear()
         await self.config.guild(ctx.guild).scoreboard_message.clear()
+        await self.config.guild(ctx.guild).scoreboard_fingerprint.clear()
         await ctx.send(_("Scoreboard locked."))
 
     @tasks.loop(minutes=5)
     async def update_dungeon_scoreboard(self):
-        for guild in self.bot.guilds:
-            if await self.bot.cog_disabled_in_guild(self, guild):
-                continue
-            await set_contextual_locales_from_guild(self.bot, guild)
+        workers: int = await self.config.scoreboard_workers()
+        snapshot = await ConfigSnapshot.build(self.config)
+        guilds = [
+            guild
+            for guild in snapshot.enabled_guilds(self.bot, "scoreboard")
+            if not await self.bot.cog_disabled_in_guild(self, guild)
+        ]
+        timed_out = await gather_bounded(
+            functools.partial(self._update_guild_scoreboard, snapshot=snapshot),
+            guilds,
+            workers=workers,
+            timeout=SCOREBOARD_TICK_BUDGET,
+        )
+        if timed_out:
+            log.warning(
+                f"Scoreboard update ran out of time, {timed_out} guild(s) were not updated."
+            )
 
-            sb_channel_id: int = await self.config.guild(guild).scoreboard_channel()
-            sb_msg_id: int = await self.config.guild(guild).scoreboard_message()
-            if not (sb_channel_id and sb_msg_id):
-                continue
-            sb_channel: discord.TextChannel = guild.get_channel(sb_channel_id)
+    async def _update_guild_scoreboard(self, guild: discord.Guild, snapshot: ConfigSnapshot):
+        await set_contextual_locales_from_guild(self.bot, guild)
+        settings = snapshot[guild.id]
 
-            try:
-                sb_msg: discord.Message = await sb_channel.fetch_message(sb_msg_id)
-            except discord.HTTPException:
-                log.error(
-                    f"Failed to fetch scoreboard message in guild {guild.id} ({guild.name}).",
-                    exc_info=True,
-                )
-                continue
-            if not sb_msg:
-                continue
+        sb_channel_id: int = settings["scoreboard_channel"]
+        sb_msg_id: int = settings["scoreboard_message"]
+        sb_channel: discord.TextChannel = guild.get_channel(sb_channel_id)
 
-            max_chars = 20
-            headers = ["#", _("Name"), _("Score")]
-            region: str = await self.config.guild(guild).region()
-            realm: str = await self.config.guild(guild).realm()
-            guild_name: str = await self.config.guild(guild).real_guild_name()
-            sb_blacklist: List[str] = await self.config.guild(guild).scoreboard_blacklist()
-            if not region or not realm or not guild_name:
-                continue
-            image: bool = await self.config.guild(guild).sb_image()
+        max_chars = 20
+        headers = ["#", _("Name"), _("Score")]
+        region: str = settings["region"]
+        realm: str = settings["realm"]
+        guild_name: str = settings["real_guild_name"]
+        sb_blacklist: List[str] = settings["scoreboard_blacklist"]
+        if not region or not realm or not guild_name:
+            return
+        image: bool = settings["sb_image"]
 
-            embed = discord.Embed(
-                title=_("Mythic+ Guild Scoreboard"),
-                color=await self.bot.get_embed_color(sb_msg),
+        try:
+            tabulate_list = await self._get_dungeon_scores(
+                guild_name,
+                max_chars,
+                realm,
+                region,
+                sb_blacklist,
+                image=image,
             )
-            embed.set_author(name=guild.name, icon_url=guild.icon.url)
-            try:
-                tabulate_list = await self._get_dungeon_scores(
-                    guild_name,
-                    max_chars,
-                    realm,
-                    region,
-                    sb_blacklist,
-                    image=image,
-                )
-            except ValueError as e:
-                log.error(f"Error getting dungeon scores for {guild.id}, skipping. Response: {e}")
-                continue
+        except ValueError as e:
+            log.error(f"Error getting dungeon scores for {guild.id}, skipping. Response: {e}")
+            return
+        cutoff = await self.get_season_title_cutoff(region)
 
-            # TODO: When dpy2 is out, use discord.utils.format_dt()
-            desc = _("Last updated <t:{timestamp}:R>\n").format(
-                timestamp=int(datetime.now(timezone.utc).timestamp())
+        # Don't fetch, render or edit anything if there wouldn't be a change
+        fingerprint = self._scoreboard_fingerprint(tabulate_list, cutoff, image)
+        if fingerprint == settings["scoreboard_fingerprint"]:
+            return
+
+        if not sb_channel:
+            log.error(f"Scoreboard channel in guild {guild.id} ({guild.name}) not found.")
+            return
+        sb_msg = self._get_scoreboard_message(guild, sb_channel, sb_msg_id)
+
+        embed = discord.Embed(
+            title=_("Mythic+ Guild Scoreboard"),
+            color=await self.bot.get_embed_color(sb_channel),
+        )
+        embed.set_author(name=guild.name, icon_url=guild.icon.url)
+
+        # TODO: When dpy2 is out, use discord.utils.format_dt()
+        desc = _("Last updated <t:{timestamp}:R>\n").format(
+            timestamp=int(datetime.now(timezone.utc).timestamp())
+        )
+        if cutoff:
+            desc += _("Score cutoff for season title: `{cutoff}`\n").format(cutoff=cutoff)
+
+        if image:
+            img_file = await self._generate_scoreboard_image(
+                tabulate_list, dev_guild=guild.id in DEV_GUILDS
             )
-            if cutoff := await self.get_season_title_cutoff(region):
-                desc += _("Score cutoff for season title: `{cutoff}`\n").format(cutoff=cutoff)
+            embed.set_image(url=f"attachment://{img_file.filename}")
+        else:
+            formatted_rankings = box(
+                tabulate(
+                    tabulate_list,
+                    headers=headers,
+                    tablefmt="plain",
+                    disable_numparse=True,
+                ),
+                lang="md",
+            )
+            desc += formatted_rankings
+        embed.set_footer(text=_("Updates only when there is a ranking change"))
 
+        if await self.config.assistant_cog_integration():
+            self.queue_assistant_embedding(guild, image, tabulate_list)
+
+        embed.description = desc
+
+        try:
             if image:
-                img_file = await self._generate_scoreboard_image(
-                    tabulate_list, dev_guild=guild.id in DEV_GUILDS
-                )
-                embed.set_image(url=f"attachment://{img_file.filename}")
-                embed.set_footer(text=_("Updates every 5 minutes"))
+                await sb_msg.edit(embed=embed, attachments=[img_file])
             else:
-                formatted_rankings = box(
-                    tabulate(
-                        tabulate_list,
-                        headers=headers,
-                        tablefmt="plain",
-                        disable_numparse=True,
-                    ),
-                    lang="md",
-                )
-                desc += formatted_rankings
+                await sb_msg.edit(embed=embed, attachments=[])
+        except discord.NotFound:
+            await self._handle_missing_scoreboard(guild, sb_channel, sb_msg_id)
+            return
+        except discord.Forbidden:
+            log.error(
+                f"Failed to edit scoreboard message in guild {guild.id} ({guild.name}) "
+                f"due to missing permissions.",
+                exc_info=True,
+            )
+            return
+        except discord.HTTPException:
+            log.error(
+                f"Failed to edit scoreboard message in guild {guild.id} ({guild.name}).",
+                exc_info=True,
+            )
+            return
+        await self.config.guild(guild).scoreboard_fingerprint.set(fingerprint)
+
+    def _get_scoreboard_message(
+        self, guild: discord.Guild, sb_channel: discord.TextChannel, sb_msg_id: int
+    ) -> discord.PartialMessage | discord.Message:
+        """Get a handle to the scoreboard message that can be edited without fetching it."""
+        sb_msg = self.scoreboard_messages.get(guild.id)
+        if sb_msg is None or sb_msg.id != sb_msg_id or sb_msg.channel.id != sb_channel.id:
+            sb_msg = sb_channel.get_partial_message(sb_msg_id)
+            self.scoreboard_messages[guild.id] = sb_msg
+        return sb_msg
+
+    async def _handle_missing_scoreboard(
+        self, guild: discord.Guild, sb_channel: discord.TextChannel, sb_msg_id: int
+    ):
+        self.scoreboard_messages.pop(guild.id, None)
+        try:
+            # Editing said it's gone, make sure before forgetting about it
+            self.scoreboard_messages[guild.id] = await sb_channel.fetch_message(sb_msg_id)
+        except discord.NotFound:
+            log.warning(
+                f"Scoreboard message in guild {guild.id} ({guild.name}) was deleted, "
+                f"it will no longer be updated."
+            )
+            await self.config.guild(guild).scoreboard_message.clear()
+            await self.config.guild(guild).scoreboard_fingerprint.clear()
+        except discord.HTTPException:
+            log.error(
+                f"Failed to fetch scoreboard message in guild {guild.id} ({guild.name}).",
+                exc_info=True,
+            )
 
-                # Don't edit if there wouldn't be a change
-                old_rankings = sb_msg.embeds[0].description.splitlines()
-                old_rankings = "\n".join(old_rankings[1:])
-                if old_rankings == formatted_rankings:
-                    continue
-                embed.set_footer(text=_("Updates only when there is a ranking change"))
+    @staticmethod
+    def _scoreboard_fingerprint(tabulate_list: list, cutoff: float, image: bool) -> str:
+        """Hash of everything that changes what the scoreboard message shows."""
+        content = json.dumps([tabulate_list, cutoff, image], separators=(",", ":"))
+        return hashlib.sha256(content.encode()).hexdigest()
 
-            ass_integration = await self.config.assistant_cog_integration()
-            if (assistant := self.bot.get_cog("Assistant")) and ass_integration:
-                await self.add_assistant_embedding(assistant, guild, image, tabulate_list)
+    def queue_assistant_embedding(self, guild: discord.Guild, image: bool, tabulate_list: list):
+        """Queue the scoreboard to be pushed to the Assistant cog in the background.
 
-            embed.description = desc
+        Queuing again before the push replaces the pending scoreboard, and rankings that
+        were already embedded are skipped.
+        """
+        formatted_rankings = self._format_assistant_embedding(image, tabulate_list)
+        content_hash = hashlib.sha256(formatted_rankings.encode()).hexdigest()
+        if self.assistant_embedding_hashes.get(guild.id) == content_hash:
+            self.assistant_embedding_queue.pop(guild.id, None)
+            return
+        self.assistant_embedding_queue[guild.id] = (
+            formatted_rankings,
+            content_hash,
+            time.monotonic(),
+        )
 
+    @tasks.loop(seconds=30)
+    async def push_assistant_embeddings(self):
+        assistant = self.bot.get_cog("Assistant")
+        if not assistant or not await self.config.assistant_cog_integration():
+            self.assistant_embedding_queue.clear()
+            return
+        now = time.monotonic()
+        for guild_id, (formatted_rankings, content_hash, queued_at) in list(
+            self.assistant_embedding_queue.items()
+        ):
+            # Wait for the rankings to settle so a busy guild isn't embedded every tick
+            if now - queued_at < ASSISTANT_EMBEDDING_DEBOUNCE:
+                continue
+            del self.assistant_embedding_queue[guild_id]
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                continue
             try:
-                if image:
-                    await sb_msg.edit(embed=embed, attachments=[img_file])
-                else:
-                    await sb_msg.edit(embed=embed, attachments=[])
-            except discord.Forbidden:
-                log.error(
-                    f"Failed to edit scoreboard message in guild {guild.id} ({guild.name}) "
-                    f"due to missing permissions.",
-                    exc_info=True,
-                )
-            except discord.HTTPException:
-                log.error(
-                    f"Failed to edit scoreboard message in guild {guild.id} ({guild.name}).",
-                    exc_info=True,
+                await assistant.add_embedding(
+                    guild, "wowtools_scoreboard", formatted_rankings, True
                 )
+            except Exception as e:
+                log.error(f"Error adding scoreboard to Assistant: {e}", exc_info=True)
+                continue
+            self.assistant_embedding_hashes[guild_id] = content_hash
+
+    @push_assistant_embeddings.error
+    async def push_assistant_embeddings_error(self, error):
+        log.error(f"Unhandled error in push_assistant_embeddings task: {error}", exc_info=True)
 
     @staticmethod
-    async def add_assistant_embedding(assistant, guild, image, tabulate_list):
+    def _format_assistant_embedding(image: bool, tabulate_list: list) -> str:
         if image:
             formatted_tab_list = [char[:3] + [char[-1]] for char in tabulate_list]
         headers = ["#", " | Name", " | Score", " | Item level"]
@@ -428,18 +545,71 @@ class Scoreboard:
             tablefmt="plain",
             disable_numparse=True,
         )
-        try:
-            await assistant.add_embedding(guild, "wowtools_scoreboard", formatted_rankings, True)
-        except Exception as e:
-            log.error(f"Error adding scoreboard to Assistant: {e}", exc_info=True)
+        return formatted_rankings
 
     async def get_season_title_cutoff(self, region: str) -> float:
-        current_season = "season-tww-3"  # TODO: Needs to be manually updated every season
+        region = region.lower()
+        return await self.season_cutoff_cache.get(
+            region, lambda: self._fetch_season_title_cutoff(region)
+        )
+
+    async def _fetch_season_title_cutoff(self, region: str) -> float:
+        current_season = await self.get_current_mplus_season(region)
+        if not current_season:
+            return 0
         cutoffs = (
             await self.raiderio_api.get_mythic_plus_season_cutoffs(region, current_season)
         ).get("cutoffs")
         return cutoffs["p999"]["all"]["quantileMinValue"] if cutoffs else 0
 
+    async def get_current_mplus_season(self, region: str) -> Optional[str]:
+        """Get the slug of the Mythic+ season that is currently running in a region."""
+        try:
+            slug = await self.mplus_season_cache.get(
+                region, lambda: self._find_current_mplus_season(region)
+            )
+        except LookupError:
+            # Keep using the last known season if Raider.io doesn't have anything for us
+            slug = self.mplus_seasons.get(region)
+            log.warning(
+                f"No started Mythic+ season found for {region} on Raider.io, using {slug}."
+            )
+            return slug
+        self.mplus_seasons[region] = slug
+        return slug
+
+    async def _find_current_mplus_season(self, region: str) -> str:
+        now = datetime.now(timezone.utc)
+        # Check the next expansion first so a new season is picked up without a code change,
+        # and earlier ones for the gap between an expansion's launch and its first season
+        for expansion_id in range(
+            RAIDERIO_EXPANSION_ID + 1, RAIDERIO_FIRST_MPLUS_EXPANSION_ID - 1, -1
+        ):
+            static_data = await self.raiderio_api.get_mythic_plus_static_data(expansion_id)
+            started = [
+                season
+                for season in static_data.get("seasons", [])
+                if (season.get("starts") or {}).get(region)
+                and isoparse(season["starts"][region]) <= now
+            ]
+            if started:
+                return max(started, key=lambda s: isoparse(s["starts"][region]))["slug"]
+        raise LookupError(f"No started Mythic+ season in {region}.")
+
+    @tasks.loop(minutes=30)
+    async def refresh_season_cutoffs(self):
+        for region in self.season_cutoff_cache.keys():
+            try:
+                cutoff = await self._fetch_season_title_cutoff(region)
+            except Exception:
+                log.error(f"Failed to refresh season cutoff for {region}.", exc_info=True)
+                continue
+            self.season_cutoff_cache.set(region, cutoff)
+
+    @refresh_season_cutoffs.error
+    async def refresh_season_cutoffs_error(self, error):
+        log.error(f"Unhandled error in refresh_season_cutoffs task: {error}", exc_info=True)
+
     @update_dungeon_scoreboard.error
     async def update_dungeon_scoreboard_error(self, error):
         # Thanks Flame!
@@ -454,72 +624,72 @@ class Scoreboard:
         sb_blacklist: List[str],
         image: bool,
     ):
-        roster = await self.raiderio_api.get_guild_roster(region, realm, guild_name)
-        if "error" in roster.keys():
-            raise ValueError(f"{roster['message']}.")
-
-        lb = {}
-        # TODO: Surely there's a better way to do literally everything below
-        for char in roster["guildRoster"]["roster"]:
-            char_name: str = char["character"]["name"]
-            if any(char.isdigit() for char in char_name):
-                continue
-
-            score = char["keystoneScores"]["allScore"]
-
-            if score > 250 and char_name.lower() not in sb_blacklist:
-                if image:
-                    class_color: str = ClassColor.get_class_color(
-                        char["character"]["class"]["name"]
-                    )
-                    char_img: str = (
-                        "https://render.worldofwarcraft.com/{region}/character/{}".format(
-                            char["character"]["thumbnail"], region=region
-                        )
-                    )
-                    ilvl = str(char["character"]["items"]["item_level_equipped"])
-                    score_color: str = char["keystoneScores"]["allScoreColor"]
-                    lb[char_name] = (score, score_color, char_img, class_color, ilvl)
-                else:
-                    lb[char_name] = score
-
-        lb = dict(sorted(lb.items(), key=lambda i: i[1], reverse=True))
-
-        chars = list(lb.keys())[:max_chars]
-        scores = list(lb.values())[:max_chars]
+        roster = await self._get_guild_roster_cached(region, realm, guild_name)
+        top_chars = self._rank_roster(roster["guildRoster"]["roster"], max_chars, sb_blacklist)
 
         tabulate_list = []
-        for index, char_info in enumerate(zip(chars, scores)):
-            char_name = char_info[0]
+        for index, char in enumerate(top_chars):
             if image:
-                char_score = char_info[1][0]
-                char_score_color = char_info[1][1]
-                char_img = char_info[1][2]
-                class_color = char_info[1][3]
-                ilvl = char_info[1][4]
+                character = char.entry["character"]
                 tabulate_list.append(
                     [
                         f"{index + 1}.",
-                        char_name,
-                        str(int(char_score)),
-                        char_score_color,
-                        char_img,
-                        class_color,
-                        ilvl,
+                        char.name,
+                        str(int(char.score)),
+                        char.entry["keystoneScores"]["allScoreColor"],
+                        "https://render.worldofwarcraft.com/{region}/character/{}".format(
+                            character["thumbnail"], region=region
+                        ),
+                        ClassColor.get_class_color(character["class"]["name"]),
+                        str(character["items"]["item_level_equipped"]),
                     ]
                 )
             else:
-                char_score = char_info[1]
                 tabulate_list.append(
                     [
                         f"{index + 1}.",
-                        char_name,
-                        humanize_number(int(char_score)),
+                        char.name,
+                        humanize_number(int(char.score)),
                     ]
                 )
 
         return tabulate_list
 
+    @staticmethod
+    def _rank_roster(
+        roster: List[dict], max_chars: int, sb_blacklist: List[str]
+    ) -> List["RankedCharacter"]:
+        """Pick the ``max_chars`` highest scoring eligible characters, best first.
+
+        Characters are keyed by name, as the scoreboard always has been, so of namesakes
+        on different realms only the last one in the roster is ranked. Only the top
+        entries are sorted, through a bounded heap.
+        """
+        blacklist = {name.lower() for name in sb_blacklist}
+
+        eligible: dict[str, RankedCharacter] = {}
+        for entry in roster:
+            char_name: str = entry["character"]["name"]
+            if any(char.isdigit() for char in char_name):
+                continue
+            score = entry["keystoneScores"]["allScore"]
+            if score > 250 and char_name.lower() not in blacklist:
+                eligible[char_name] = RankedCharacter(score, char_name, entry)
+
+        return heapq.nlargest(max_chars, eligible.values(), key=lambda char: char.score)
+
+    async def _get_guild_roster_cached(self, region: str, realm: str, guild_name: str) -> dict:
+        """Get a guild's Raider.io roster, shared between every server tracking that guild."""
+
+        async def fetch() -> dict:
+            roster = await self.raiderio_api.get_guild_roster(region, realm, guild_name)
+            if "error" in roster.keys():
+                raise ValueError(f"{roster['message']}.")
+            return roster
+
+        key = (region.lower(), realm.lower(), guild_name.lower())
+        return await self.roster_cache.get(key, fetch)
+
     async def _generate_dungeon_scoreboard(self, ctx: commands.Context, image: bool = False):
         max_chars = 20
         headers = ["#", _("Name"), _("Score")]
@@ -572,69 +742,27 @@ class Scoreboard:
             return embed
 
     async def _generate_scoreboard_image(self, tabulate_list: list, dev_guild: bool = False):
-        img_path = str(
-            bundled_data_path(self) / "scoreboard-jrk.png"
-            if dev_guild
-            else bundled_data_path(self) / "scoreboard-df-s1.png"
+        thumbnails = await self.thumbnail_cache.get_many(
+            [character[4] for character in tabulate_list[:10]]
+        )
+        rows = [
+            ImageRow(
+                name=character[1],
+                score=character[2],
+                score_color=character[3],
+                class_color=character[5],
+                ilvl=character[6],
+                thumbnail=thumbnail,
+            )
+            for character, thumbnail in zip(tabulate_list[:10], thumbnails)
+        ]
+        # Rendering blocks, so keep it off the event loop
+        image = await asyncio.get_running_loop().run_in_executor(
+            self.render_executor,
+            functools.partial(render_scoreboard, rows, self.assets, dev_guild),
         )
-        img = Image.open(img_path)
-        draw = ImageDraw.Draw(img)
-        font = ImageFont.truetype(str(bundled_data_path(self) / "Roboto-Bold.ttf"), 28)
-
-        x = 150
-        y = 100 if dev_guild else 25
-
-        for character in tabulate_list[:10]:
-            char_name = character[1]
-            score = character[2]
-            ilvl = character[6]
-
-            score_color = ImageColor.getcolor(character[3], "RGB")
-            class_color = ImageColor.getcolor(character[5], "RGB")
-            ilvl_color = self._get_ilvl_color(int(ilvl))
-
-            async with self.session.request("GET", character[4]) as resp:
-                image = await resp.content.read()
-                image = Image.open(io.BytesIO(image))
-                image = image.resize((65, 65))
-                img.paste(image, (x - 79, y - 15))
-
-            draw.text((x, y), char_name, class_color, font=font)
-            if int(ilvl) >= 679:  # This is whatever the color for the highest ilvl is
-                glow = Image.new("RGBA", img.size, (0, 0, 0, 0))
-                ImageDraw.Draw(glow).text((x + 225, y), ilvl, ilvl_color, font=font)
-                blurred_glow = glow.filter(ImageFilter.GaussianBlur(5))
-                ImageDraw.Draw(blurred_glow).text((x + 225, y), ilvl, ilvl_color, font=font)
-                img = Image.alpha_composite(img, blurred_glow)
-                # have to reassing draw
-                draw = ImageDraw.Draw(img)
-            else:
-                draw.text((x + 225, y), ilvl, ilvl_color, font=font)
-            draw.text((x + 300, y), score, score_color, font=font)
-            y += 75
-
-        img_obj = io.BytesIO()
-        img.save(img_obj, format="PNG")
-        img_obj.seek(0)
-
-        return discord.File(fp=img_obj, filename="scoreboard.png")
 
-    @staticmethod
-    def _get_ilvl_color(ilvl: int) -> str:
-        if ilvl >= 717:
-            return "#f16960"
-        elif ilvl >= 714:
-            return "#FF69B4"
-        elif ilvl >= 709:
-            return "#FFA500"
-        elif ilvl >= 705:
-            return "#b040c2"
-        elif ilvl >= 698:
-            return "#445bc2"
-        elif ilvl >= 692:
-            return "#00ff1a"
-        else:
-            return "#FFFFFF"
+        return discord.File(fp=io.BytesIO(image), filename="scoreboard.png")
 
     @staticmethod
     async def _delete_scoreboard(ctx: commands.Context, sb_channel_id: int, sb_msg_id: int):
@@ -753,16 +881,16 @@ class Scoreboard:
         max_level = 80
         async with api_client as client:
             wow_client = client.Retail
-            # await self.limiter.acquire()
-            current_season: int = (await wow_client.GameData.get_pvp_seasons_index())[
-                "current_season"
-            ]["id"]
+            async with self.limiter.limit(region, priority=Priority.BULK):
+                current_season: int = (await wow_client.GameData.get_pvp_seasons_index())[
+                    "current_season"
+                ]["id"]
 
-            # await self.limiter.acquire()
             try:
-                guild_roster = await wow_client.Profile.get_guild_roster(
-                    name_slug=guild_name, realm_slug=realm
-                )
+                async with self.limiter.limit(region, priority=Priority.BULK):
+                    guild_roster = await wow_client.Profile.get_guild_roster(
+                        name_slug=guild_name, realm_slug=realm
+                    )
             except ClientResponseError:
                 await ctx.send(_("Guild not found."))
                 return []
@@ -784,21 +912,16 @@ class Scoreboard:
                         tri_statistics,
                     ) = await client.multi_request(
                         [
-                            wow_client.Profile.get_character_pvp_bracket_statistics(
-                                character_name=character_name,
-                                realm_slug=realm,
-                                pvp_bracket="rbg",
-                            ),
-                            wow_client.Profile.get_character_pvp_bracket_statistics(
-                                character_name=character_name,
-                                realm_slug=realm,
-                                pvp_bracket="2v2",
-                            ),
-                            wow_client.Profile.get_character_pvp_bracket_statistics(
-                                character_name=character_name,
-                                realm_slug=realm,
-                                pvp_bracket="3v3",
-                            ),
+                            self.limiter.run(
+                                region,
+                                wow_client.Profile.get_character_pvp_bracket_statistics(
+                                    character_name=character_name,
+                                    realm_slug=realm,
+                                    pvp_bracket=pvp_bracket,
+                                ),
+                                priority=Priority.BULK,
+                            )
+                            for pvp_bracket in ("rbg", "2v2", "3v3")
                         ]
                     )
                 except ClientResponseError:
@@ -882,6 +1005,12 @@ class Scoreboard:
         return guild_name, realm, region, sb_blacklist
 
 
+class RankedCharacter(NamedTuple):
+    score: float
+    name: str
+    entry: dict
+
+
 class ClassColor(Enum):
     DEATH_KNIGHT = "#C41F3B"
     DEMON_HUNTER = "#A330C9"
@@ -0,0 +1,102 @@
+import functools
+import io
+from typing import NamedTuple
+
+from PIL import Image, ImageColor, ImageDraw, ImageFilter, ImageFont
+
+from .assets import (
+    SCOREBOARD_BACKGROUND,
+    SCOREBOARD_BACKGROUND_DEV,
+    SCOREBOARD_FONT,
+    AssetRegistry,
+)
+
+# This is whatever the color for the highest ilvl is
+GLOW_ILVL = 679
+GLOW_RADIUS = 5
+
+
+class ImageRow(NamedTuple):
+    """Everything needed to draw one character on the scoreboard image."""
+
+    name: str
+    score: str
+    score_color: str
+    class_color: str
+    ilvl: str
+    thumbnail: bytes | None
+
+
+def render_scoreboard(
+    rows: list[ImageRow], assets: AssetRegistry, dev_guild: bool = False
+) -> bytes:
+    """
+    Draw the scoreboard image and encode it as PNG.
+
+    This only works on plain data and does blocking Pillow work, so it is meant to be run
+    in an executor rather than on the event loop.
+    """
+    img = assets.image(SCOREBOARD_BACKGROUND_DEV if dev_guild else SCOREBOARD_BACKGROUND)
+    draw = ImageDraw.Draw(img)
+    font = assets.font(SCOREBOARD_FONT, 28)
+
+    x = 150
+    y = 100 if dev_guild else 25
+
+    for row in rows:
+        score_color = ImageColor.getcolor(row.score_color, "RGB")
+        class_color = ImageColor.getcolor(row.class_color, "RGB")
+        ilvl_color = get_ilvl_color(int(row.ilvl))
+
+        if row.thumbnail:
+            img.paste(Image.open(io.BytesIO(row.thumbnail)), (x - 79, y - 15))
+
+        draw.text((x, y), row.name, class_color, font=font)
+        if int(row.ilvl) >= GLOW_ILVL:
+            sprite, (offset_x, offset_y) = glow_sprite(row.ilvl, ilvl_color, font)
+            img.alpha_composite(sprite, (x + 225 + offset_x, y + offset_y))
+        else:
+            draw.text((x + 225, y), row.ilvl, ilvl_color, font=font)
+        draw.text((x + 300, y), row.score, score_color, font=font)
+        y += 75
+
+    img_obj = io.BytesIO()
+    img.save(img_obj, format="PNG")
+    return img_obj.getvalue()
+
+
+@functools.lru_cache(maxsize=256)
+def glow_sprite(
+    text: str, color: str, font: ImageFont.FreeTypeFont
+) -> tuple[Image.Image, tuple[int, int]]:
+    """
+    Draw glowing text on a transparent sprite that only covers the text and its glow.
+
+    :return: The sprite and its offset from the position the text would be drawn at.
+    """
+    left, top, right, bottom = font.getbbox(text)
+    # The blur spreads a few radii past the glyphs, anything further out is fully transparent
+    pad = GLOW_RADIUS * 3 + 2
+    offset = (left - pad, top - pad)
+    sprite = Image.new("RGBA", (right - left + pad * 2, bottom - top + pad * 2), (0, 0, 0, 0))
+    ImageDraw.Draw(sprite).text((-offset[0], -offset[1]), text, color, font=font)
+    sprite = sprite.filter(ImageFilter.GaussianBlur(GLOW_RADIUS))
+    ImageDraw.Draw(sprite).text((-offset[0], -offset[1]), text, color, font=font)
+    return sprite, offset
+
+
+def get_ilvl_color(ilvl: int) -> str:
+    if ilvl >= 717:
+        return "#f16960"
+    elif ilvl >= 714:
+        return "#FF69B4"
+    elif ilvl >= 709:
+        return "#FFA500"
+    elif ilvl >= 705:
+        return "#b040c2"
+    elif ilvl >= 698:
+        return "#445bc2"
+    elif ilvl >= 692:
+        return "#00ff1a"
+    else:
+        return "#FFFFFF"
@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlparse
+
+import aiohttp
+from PIL import Image
+
+log = logging.getLogger("red.karlo-cogs.wowtools")
+
+
+@dataclass
+class Thumbnail:
+    data: bytes
+    etag: str | None = None
+    last_modified: str | None = None
+    checked_at: float = 0.0
+
+
+class ThumbnailCache:
+    """
+    LRU cache of resized character thumbnails, kept in memory and on disk.
+
+    Entries are keyed by the thumbnail's URL path and stored as already resized PNGs.
+    Once an entry is older than ``max_age`` it is revalidated with ETag/If-Modified-Since,
+    so unchanged thumbnails are never downloaded twice.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        path: Path,
+        size: tuple[int, int] = (65, 65),
+        maxsize: int = 512,
+        disk_maxsize: int = 4096,
+        max_age: float = 60 * 60 * 6,
+    ):
+        self.session = session
+        self.path = path
+        self.size = size
+        self.maxsize = maxsize
+        self.disk_maxsize = disk_maxsize
+        self.max_age = max_age
+        self.hits = 0
+        self.revalidated = 0
+        self.downloads = 0
+        self.errors = 0
+        self._memory: OrderedDict[str, Thumbnail] = OrderedDict()
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    async def get_many(self, urls: list[str]) -> list[bytes | None]:
+        """Get several thumbnails at once, downloading the missing ones concurrently."""
+        return list(await asyncio.gather(*(self.get(url) for url in urls)))
+
+    async def get(self, url: str) -> bytes | None:
+        """
+        Get a resized thumbnail as PNG bytes.
+
+        :param url: URL of the thumbnail.
+        :return: PNG bytes, or None if the thumbnail could not be downloaded.
+        """
+        key = urlparse(url).path
+        entry = self._memory.get(key)
+        if entry is None:
+            entry = await asyncio.to_thread(self._load, key)
+            if entry is not None:
+                self._remember(key, entry)
+        else:
+            self._memory.move_to_end(key)
+
+        if entry is not None and time.time() - entry.checked_at < self.max_age:
+            self.hits += 1
+            return entry.data
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        try:
+            async with self.session.get(url, headers=headers) as resp:
+                if resp.status == 304 and entry is not None:
+                    self.revalidated += 1
+                    entry.checked_at = time.time()
+                    await asyncio.to_thread(self._save, key, entry, False)
+                    return entry.data
+                resp.raise_for_status()
+                raw = await resp.read()
+                etag = resp.headers.get("ETag")
+                last_modified = resp.headers.get("Last-Modified")
+            data = await asyncio.to_thread(self._resize, raw)
+        # Network errors, failed disk writes, and images Pillow can't read (which are OSErrors)
+        except (
+            aiohttp.ClientError,
+            asyncio.TimeoutError,
+            OSError,
+            Image.DecompressionBombError,
+        ) as e:
+            self.errors += 1
+            log.debug(f"Failed to download thumbnail {url}: {e}")
+            # A stale thumbnail is better than none
+            return entry.data if entry is not None else None
+
+        self.downloads += 1
+        entry = Thumbnail(data, etag, last_modified, time.time())
+        self._remember(key, entry)
+        await asyncio.to_thread(self._save, key, entry, True)
+        return data
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._memory),
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "downloads": self.downloads,
+            "errors": self.errors,
+        }
+
+    def _remember(self, key: str, entry: Thumbnail) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def _resize(self, raw: bytes) -> bytes:
+        image = Image.open(io.BytesIO(raw)).resize(self.size)
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    def _file_stem(self, key: str) -> Path:
+        return self.path / hashlib.sha1(key.encode()).hexdigest()
+
+    def _load(self, key: str) -> Thumbnail | None:
+        stem = self._file_stem(key)
+        try:
+            data = stem.with_suffix(".png").read_bytes()
+            meta = json.loads(stem.with_suffix(".json").read_text())
+        except (OSError, ValueError):
+            return None
+        return Thumbnail(data, meta.get("etag"), meta.get("last_modified"), meta["checked_at"])
+
+    def _save(self, key: str, entry: Thumbnail, write_image: bool) -> None:
+        stem = self._file_stem(key)
+        try:
+            if write_image:
+                stem.with_suffix(".png").write_bytes(entry.data)
+            stem.with_suffix(".json").write_text(
+                json.dumps(
+                    {
+                        "etag": entry.etag,
+                        "last_modified": entry.last_modified,
+                        "checked_at": entry.checked_at,
+                    }
+                )
+            )
+        except OSError:
+            log.warning(f"Failed to write thumbnail {key} to disk.", exc_info=True)
+            return
+        if write_image:
+            self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        images = list(self.path.glob("*.png"))
+        if len(images) <= self.disk_maxsize:
+            return
+        images.sort(key=lambda file: file.stat().st_mtime)
+        for image in images[: len(images) - self.disk_maxsize]:
+            image.unlink(missing_ok=True)
+            image.with_suffix(".json").unlink(missing_ok=True)
@@ -1,19 +1,32 @@
+import asyncio
+import functools
+import io
+import logging
+import time
+from datetime import datetime, timezone
 from typing import List
 
 import discord
+from aiowowapi import WowApi
 from discord import app_commands
+from discord.ext import tasks
 from redbot.core import commands
 from redbot.core.i18n import Translator, set_contextual_locales_from_guild
 
-from .utils import format_to_gold
+from .charts import ChartSeries, render_line_chart
+from .price_history import TokenQuote
+from .ratelimit import Priority
+from .utils import format_chart_gold, format_to_gold
 
+log = logging.getLogger("red.karlo-cogs.wowtools")
 _ = Translator("WoWTools", __file__)
 
 VALID_REGIONS = ["eu", "us", "kr"]
+REGION_COLORS = {"eu": "#3498db", "us": "#e74c3c", "kr": "#2ecc71"}
 
 
 class Token:
-    @commands.hybrid_command()
+    @commands.hybrid_group(fallback="price", invoke_without_command=True)
     async def wowtoken(self, ctx: commands.Context, region: str = "all"):
         """Check price of WoW token in a region"""
         if ctx.interaction:
@@ -31,12 +44,7 @@ class Token:
                 ephemeral=True,
             )
             return
-        try:
-            api_client = self.blizzard.get(region)
-        except Exception as e:
-            await ctx.send(_("Command failed successfully. {e}").format(e=e))
-            return
-        if not api_client:
+        if not self.blizzard.get(region):
             await ctx.send(
                 _(
                     "The Blizzard API is not properly set up.\n"
@@ -47,16 +55,15 @@ class Token:
             )
             return
 
-        await ctx.defer()
-        async with api_client as wow_client:
-            wow_client = wow_client.Retail
-            await self.limiter.acquire()
-            wow_token = await wow_client.GameData.get_wow_token_index()
-        token_price = wow_token["price"]
+        quote = self.token_quotes.get(region)
+        if not quote:
+            # Only until refresh_token_prices has run once
+            await ctx.defer()
+            quote = await self.fetch_token_quote(region)
 
         gold_emotes = await self.config.emotes()
         message = _("Current price of the {region} WoW Token is: **{gold}**").format(
-            region=region.upper(), gold=format_to_gold(token_price, gold_emotes)
+            region=region.upper(), gold=format_to_gold(quote.price, gold_emotes)
         )
 
         if ctx.channel.permissions_for(ctx.guild.me).embed_links:
@@ -75,29 +82,99 @@ class Token:
             if current.lower() in region.lower()
         ]
 
+    @commands.cooldown(rate=1, per=10, type=commands.BucketType.user)
+    @wowtoken.command(name="history")
+    @commands.bot_has_permissions(embed_links=True, attach_files=True)
+    async def wowtoken_history(self, ctx: commands.Context, region: str = "all", days: int = 30):
+        """Show how the price of the WoW token changed over the last few days."""
+        if ctx.interaction:
+            # There is no contextual locale for interactions, so we need to set it manually
+            # (This is probably a bug in Red, remove this when it's fixed)
+            await set_contextual_locales_from_guild(self.bot, ctx.guild)
+
+        region = region.lower()
+        if region != "all" and region not in VALID_REGIONS:
+            await ctx.send(
+                _("Invalid region. Valid regions are: `eu`, `us`, `kr` or `all`."),
+                ephemeral=True,
+            )
+            return
+        days = max(1, min(days, 365))
+
+        async with ctx.typing():
+            since = time.time() - days * 60 * 60 * 24
+            series = []
+            for token_region in VALID_REGIONS if region == "all" else [region]:
+                history = await self.price_history.get_token(token_region, since)
+                if history:
+                    series.append(
+                        ChartSeries(
+                            token_region.upper(),
+                            REGION_COLORS[token_region],
+                            [(quote.timestamp, quote.price) for quote in history],
+                        )
+                    )
+            if not series:
+                await ctx.send(_("No WoW Token prices have been recorded yet."))
+                return
+
+            chart = await asyncio.get_running_loop().run_in_executor(
+                self.render_executor,
+                functools.partial(render_line_chart, series, self.assets, format_chart_gold),
+            )
+            embed = discord.Embed(
+                title=_("WoW Token price history"),
+                colour=await ctx.embed_color(),
+                timestamp=datetime.now(timezone.utc),
+            )
+            embed.set_image(url="attachment://tokenhistory.png")
+            gold_emotes = await self.config.emotes()
+            for line in series:
+                prices = [price for __, price in line.points]
+                embed.add_field(
+                    name=line.label,
+                    value=_("Lowest: {low}\nHighest: {high}").format(
+                        low=format_to_gold(min(prices), gold_emotes),
+                        high=format_to_gold(max(prices), gold_emotes),
+                    ),
+                )
+
+        await ctx.send(embed=embed, file=discord.File(io.BytesIO(chart), "tokenhistory.png"))
+
+    @wowtoken_history.autocomplete("region")
+    async def wowtoken_history_region_autocomplete(
+        self, interaction: discord.Interaction, current: str
+    ) -> List[app_commands.Choice[str]]:
+        return await self.wowtoken_region_autocomplete(interaction, current)
+
     async def priceall(self, ctx: commands.Context):
         """Check price of the WoW token in all supported regions"""
         embed = discord.Embed(title=_("WoW Token prices"), colour=await ctx.embed_colour())
 
-        await ctx.defer()
+        missing = [
+            region
+            for region in VALID_REGIONS
+            if region in self.blizzard and region not in self.token_quotes
+        ]
+        if missing:
+            # Only until refresh_token_prices has run once
+            await ctx.defer()
+            results = await asyncio.gather(
+                *(self.fetch_token_quote(region) for region in missing), return_exceptions=True
+            )
+            # The regions that did load are still shown
+            for region, result in zip(missing, results):
+                if isinstance(result, Exception):
+                    log.error(f"Failed to fetch the WoW Token price of {region}.", exc_info=result)
+
+        gold_emotes = await self.config.emotes()
         for region in VALID_REGIONS:
-            try:
-                api_client = self.blizzard.get(region)
-            except Exception as e:
-                await ctx.send(_("Command failed successfully. {e}").format(e=e))
-                return
-            if not api_client:
+            quote = self.token_quotes.get(region)
+            if not quote:
                 continue
-            async with api_client as wow_client:
-                wow_client = wow_client.Retail
-                await self.limiter.acquire()
-                wow_token = await wow_client.GameData.get_wow_token_index()
-
-            token_price = str(wow_token["price"])
-            gold_emotes = await self.config.emotes()
             embed.add_field(
                 name=region.upper(),
-                value=format_to_gold(token_price, gold_emotes),
+                value=format_to_gold(quote.price, gold_emotes),
             )
         if ctx.channel.permissions_for(ctx.guild.me).embed_links:
             await ctx.send(embed=embed)
@@ -106,3 +183,49 @@ class Token:
             for field in embed.fields:
                 msg += f"{field.name}: {field.value}\n"
             await ctx.send(msg)
+
+    async def fetch_token_quote(
+        self,
+        region: str,
+        priority: Priority = Priority.INTERACTIVE,
+        client: WowApi | None = None,
+    ) -> TokenQuote:
+        """Fetch a region's current WoW Token price, caching and recording it."""
+        async with (
+            client or self.blizzard[region] as wow_client,
+            self.limiter.limit(region, priority=priority),
+        ):
+            wow_token = await wow_client.Retail.GameData.get_wow_token_index()
+        quote = TokenQuote(wow_token["last_updated_timestamp"] // 1000, wow_token["price"])
+        if self.token_quotes.get(region) != quote:
+            self.token_quotes[region] = quote
+            await self.price_history.record_token(region, quote)
+        return quote
+
+    # Blizzard updates the price every 20 minutes, polling more often keeps the cached quote
+    # from lagging far behind an update
+    @tasks.loop(minutes=5)
+    async def refresh_token_prices(self):
+        regions = [region for region in VALID_REGIONS if region in self.blizzard]
+        # The poll runs every few minutes, so on the command clients it would often overlap
+        # a command and close the session under it
+        clients = [await self.background_blizzard("token prices", region) for region in regions]
+        results = await asyncio.gather(
+            *(
+                self.fetch_token_quote(region, Priority.BULK, client)
+                for region, client in zip(regions, clients)
+            ),
+            return_exceptions=True,
+        )
+        for region, result in zip(regions, results):
+            if isinstance(result, Exception):
+                log.error(f"Failed to refresh the WoW Token price of {region}.", exc_info=result)
+
+    @refresh_token_prices.before_loop
+    async def before_refresh_token_prices(self):
+        # The Blizzard clients are created in cog_load
+        await self.bot.wait_until_red_ready()
+
+    @refresh_token_prices.error
+    async def refresh_token_prices_error(self, error):
+        log.error(f"Unhandled error in refresh_token_prices task: {error}", exc_info=True)
@@ -6,7 +6,9 @@ from aiowowapi import RetailApi
 from redbot.core import app_commands
 from redbot.core.i18n import Translator
 
-from wowtools.utils import format_to_gold, get_realms
+from wowtools.ratelimit import WEIGHT_SEARCH, Priority
+from wowtools.realm_index import REALM_INDEX
+from wowtools.utils import format_to_gold
 
 _ = Translator("WoWTools", __file__)
 
@@ -16,7 +18,7 @@ class UserInstallableAuctionHouse:
     @app_commands.allowed_installs(guilds=True, users=True)
     @app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
     @app_commands.describe(
-        item="Exact name of the item to search for",
+        item="Name of the item to search for",
         realm="Realm's auction house to search in",
     )
     @app_commands.default_permissions(embed_links=True)
@@ -28,7 +30,6 @@ class UserInstallableAuctionHouse:
         ).replace(" ", "-")
         region = region.lower()
 
-        boe_disclaimer = False
         await interaction.response.defer()
         async with self.blizzard.get(region) as wow_client:
             if not wow_client:
@@ -36,59 +37,33 @@ class UserInstallableAuctionHouse:
                 return
             wow_client: RetailApi = wow_client.Retail
 
-            found_items = await self.search_for_item(item, wow_client)
+            found_items = await self.search_for_item(item, region, wow_client)
             if not found_items:
                 await interaction.followup.send(_("No results found."))
                 return
 
-            c_realm_id = await self.get_connected_realm_id(config_realm, wow_client)
+            c_realm_id = await self.get_connected_realm_id(region, config_realm, wow_client)
             if not c_realm_id:
                 await interaction.followup.send(_("Could not find realm."))
                 return
 
             # Get price of item
-            await self.limiter.acquire()
-            auctions_data: Dict = await wow_client.GameData.get_auctions(
-                connected_realm_id=c_realm_id
-            )
-
-            auctions = auctions_data["auctions"]
-            prices = []
-            item_quantity = 0
-            for auction in auctions:
-                item_id = auction["item"]["id"]
-                if item_id in found_items:
-                    item_name = found_items[item_id]
-                    found_item_id = item_id
-                    item_quantity += auction["quantity"]
-                    try:
-                        item_price = auction["unit_price"]
-                    except KeyError:
-                        item_price = auction["buyout"]
-                        boe_disclaimer = True
-                    prices.append(item_price)
-            if not prices:
-                # Item could be a commodity
-                await self.limiter.acquire(25)
-                commodities_data: Dict = await wow_client.GameData.get_commodities()
-                auctions = commodities_data["auctions"]
-                for auction in auctions:
-                    item_id = auction["item"]["id"]
-                    if item_id in found_items:
-                        item_name = found_items[item_id]
-                        found_item_id = item_id
-                        item_quantity += auction["quantity"]
-                        item_price = auction["unit_price"]
-                        prices.append(item_price)
-                listings_str = await self.get_undermine_commodity_listings(region, found_item_id)
+            prices = await self.get_item_prices(region, c_realm_id, list(found_items))
             if not prices:
                 await interaction.followup.send(_("No auctions could be found for this item."))
                 return
+            found_item_id = prices.item_id
+            item_name = found_items[found_item_id]
+            listings_str = None
+            realm_snapshot = await self.get_auction_snapshot(region, c_realm_id)
+            if found_item_id not in realm_snapshot:
+                # Not on the realm's auction house, so the price came from the commodities
+                listings_str = await self.get_undermine_commodity_listings(region, found_item_id)
 
             # Embed stuff
             # Get item icon
-            await self.limiter.acquire()
-            item_media = await wow_client.GameData.get_item_media(item_id=found_item_id)
+            async with self.limiter.limit(region):
+                item_media = await wow_client.GameData.get_item_media(item_id=found_item_id)
             item_icon_url = item_media["assets"][0]["value"]
 
             # Create embed
@@ -102,12 +77,12 @@ class UserInstallableAuctionHouse:
                 timestamp=datetime.now(timezone.utc),
             )
             embed.set_thumbnail(url=item_icon_url)
-            min_buyout = format_to_gold(min(prices), gold_emotes)
+            min_buyout = format_to_gold(prices.min_price, gold_emotes)
             embed.add_field(name=_("Min Buyout"), value=min_buyout)
-            embed.add_field(name=_("Current quantity"), value=str(item_quantity))
+            embed.add_field(name=_("Current quantity"), value=str(prices.quantity))
             if listings_str:
                 embed.add_field(name=_("Current listings"), value=listings_str)
-            if boe_disclaimer:
+            if prices.buyout_only:
                 embed.add_field(
                     name=_("Warning"),
                     value=_(
@@ -131,8 +106,15 @@ class UserInstallableAuctionHouse:
 
         await interaction.followup.send(embed=embed, view=view)
 
-    async def search_for_item(self, item, wow_client):
-        items = await wow_client.GameData.get_item_search({"name.en_US": item, "_pageSize": 1000})
+    async def search_for_item(self, item, region, wow_client):
+        if self.item_index.ready:
+            return self.item_index.find(item)
+
+        # The item index hasn't been crawled yet
+        async with self.limiter.limit(region, WEIGHT_SEARCH):
+            items = await wow_client.GameData.get_item_search(
+                {"name.en_US": item, "_pageSize": 1000}
+            )
 
         results: Dict = items["results"]
         found_items: Dict[int, str] = {}
@@ -147,19 +129,19 @@ class UserInstallableAuctionHouse:
                 found_items[item_id] = item_name
         return found_items
 
-    async def get_connected_realm_id(self, config_realm: str, wow_client: RetailApi):
-        c_realms = await wow_client.GameData.get_connected_realms_search({"_pageSize": 1000})
-
-        c_realm_id = None
-        results: Dict = c_realms["results"]
-        for result in results:
-            c_realm_data = result["data"]
-            realms = c_realm_data["realms"]
-            for realm in realms:
-                realm_names = list(realm["name"].values())
-                realm_names = [name.lower() for name in realm_names]
-                if config_realm in realm_names:
-                    c_realm_id = c_realm_data["id"]
+    async def get_connected_realm_id(
+        self,
+        region: str,
+        config_realm: str,
+        wow_client: RetailApi,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> Optional[int]:
+        c_realm_id = self.connected_realms.get(region, config_realm)
+        if c_realm_id is None and region.lower() not in self.connected_realms.regions():
+            # First lookup in this region, build its index
+            async with self.limiter.limit(region, WEIGHT_SEARCH, priority):
+                await self.connected_realms.refresh(region, wow_client)
+            c_realm_id = self.connected_realms.get(region, config_realm)
         return c_realm_id
 
     async def get_undermine_commodity_listings(
@@ -201,9 +183,17 @@ class UserInstallableAuctionHouse:
         listings_str = None
         return listings_str
 
+    @user_install_price.autocomplete("item")
+    async def user_install_price_item_autocomplete(
+        self, interaction: discord.Interaction, current: str
+    ) -> List[app_commands.Choice[str]]:
+        return [
+            app_commands.Choice(name=name, value=name)
+            for name in self.item_index.complete(current)
+        ]
+
     @user_install_price.autocomplete("realm")
     async def user_install_price_realm_autocomplete(
         self, interaction: discord.Interaction, current: str
     ) -> List[app_commands.Choice[str]]:
-        realms = await get_realms(current)
-        return realms[:25]
+        return REALM_INDEX.search(current)
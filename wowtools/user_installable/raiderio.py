@@ -7,7 +7,7 @@ from redbot.core.commands import Context
 from redbot.core.i18n import Translator
 
 from wowtools.raiderio import ProfileMenu, Raiderio
-from wowtools.utils import get_realms
+from wowtools.realm_index import REALM_INDEX
 
 _ = Translator("WoWTools", __file__)
 
@@ -39,19 +39,7 @@ class UserInstallableRaiderio:
         )
         region = region.lower()
         await interaction.response.defer()
-        profile_data = await self.raiderio_api.get_character_profile(  # type: ignore
-            region,
-            realm,
-            character,
-            fields=[
-                "mythic_plus_scores_by_season:current",
-                "raid_progression",
-                "gear",
-                "mythic_plus_best_runs",
-                "talents",
-                "guild",
-            ],
-        )
+        profile_data = await self.get_raiderio_profile(region, realm, character)
 
         try:
             char_name = profile_data["name"]
@@ -172,8 +160,7 @@ class UserInstallableRaiderio:
     async def raiderio_profile_realm_autocomplete(
         self, interaction: discord.Interaction, current: str
     ) -> List[app_commands.Choice[str]]:
-        realms = await get_realms(current)
-        return realms[:25]
+        return REALM_INDEX.search(current)
 
     @user_install_raiderio_profile.autocomplete("character")
     async def raiderio_profile_character_autocomplete(
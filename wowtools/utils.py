@@ -1,9 +1,12 @@
-from discord import app_commands
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any
+
 from redbot.core.i18n import Translator
 from redbot.core.utils.chat_formatting import humanize_number
 
-from .autocomplete import REALMS
-
+log = logging.getLogger("red.karlo-cogs.wowtools")
 _ = Translator("WoWTools", __file__)
 
 
@@ -62,19 +65,53 @@ def format_to_gold(price: int, emotes: dict = None) -> str:
     return gold_text + silver_text + copper_text
 
 
-async def get_realms(current):
-    realms = []
-    for realm in REALMS.keys():
-        if current.lower() not in realm.lower():
-            continue
-        if len(REALMS[realm]) == 1:
-            realms.append(app_commands.Choice(name=realm, value=f"{realm}:{REALMS[realm][0]}"))
-        else:
-            realms.extend(
-                app_commands.Choice(name=f"{realm} ({region})", value=f"{realm}:{region}")
-                for region in REALMS[realm]
-            )
-    return realms
+def format_chart_gold(price: float) -> str:
+    """Short gold amount for chart axes, where the full gold/silver/copper string is too long."""
+    gold = price / 10000
+    return f"{gold:,.2f}g" if gold < 100 else f"{gold:,.0f}g"
+
+
+async def gather_bounded(
+    func: Callable[[Any], Awaitable[Any]],
+    items: Iterable[Any],
+    *,
+    workers: int,
+    timeout: float | None = None,
+) -> int:
+    """
+    Run ``func`` for every item, with at most ``workers`` calls in flight at once.
+
+    An exception raised for one item is logged and does not affect the others.
+    Calls that are still pending when ``timeout`` seconds have passed are cancelled.
+
+    :param func: Coroutine function called with each item.
+    :param items: Items to process.
+    :param workers: Maximum number of concurrent calls.
+    :param timeout: Wall-clock budget for the whole batch, in seconds.
+    :return: Number of items that were cancelled because the budget ran out.
+    """
+    semaphore = asyncio.Semaphore(max(workers, 1))
+
+    async def worker(item):
+        async with semaphore:
+            try:
+                await func(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.error(f"Unhandled error while processing {item}.", exc_info=True)
+
+    tasks = [asyncio.create_task(worker(item)) for item in items]
+    if not tasks:
+        return 0
+    try:
+        __, pending = await asyncio.wait(tasks, timeout=timeout)
+    finally:
+        for task in tasks:
+            task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    return len(pending)
 
 
 # # Undermine.exchange
@@ -1,26 +1,41 @@
+import asyncio
 import datetime
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Literal, Mapping, Optional
 
 import aiohttp
 import discord
-from aiolimiter import AsyncLimiter
 from aiowowapi import WowApi
 from discord.ext import tasks
 from raiderio_async import RaiderIO
 from redbot.core import Config, checks, commands
 from redbot.core.bot import Red
+from redbot.core.data_manager import bundled_data_path, cog_data_path
 from redbot.core.i18n import Translator, cog_i18n, set_contextual_locales_from_guild
-from redbot.core.utils.chat_formatting import humanize_list
+from redbot.core.utils.chat_formatting import box, humanize_list
 
 from wowtools.user_installable.cvardocs import CVar, CVarDocs
 
+from .assets import (
+    SCOREBOARD_BACKGROUND,
+    SCOREBOARD_BACKGROUND_DEV,
+    SCOREBOARD_FONT,
+    AssetRegistry,
+)
 from .auctionhouse import AuctionHouse
+from .cache import AsyncTTLCache, StaleWhileRevalidateCache
+from .config_snapshot import ConfigSnapshot
+from .connected_realms import ConnectedRealmIndex
 from .guildmanage import GuildManage
+from .item_index import ItemIndex
 from .on_message import OnMessage
+from .price_history import PriceHistory, TokenQuote
 from .pvp import PvP
-from .raiderio import Raiderio
+from .raiderio import PROFILE_MAX_STALE, Raiderio, profile_ttl
+from .ratelimit import BlizzardLimiter
 from .scoreboard import Scoreboard
+from .thumbnails import ThumbnailCache
 from .token import Token
 from .user_installable.auctionhouse import UserInstallableAuctionHouse
 from .user_installable.raiderio import UserInstallableRaiderio
@@ -58,6 +73,7 @@ class WoWTools(
             },
             "assistant_cog_integration": False,
             "status_guild": [],
+            "scoreboard_workers": 8,
         }
         default_guild = {
             "region": None,
@@ -73,6 +89,7 @@ class WoWTools(
             "old_sb": None,
             "scoreboard_channel": None,
             "scoreboard_message": None,
+            "scoreboard_fingerprint": None,
             "scoreboard_blacklist": [],
             "sb_image": False,
             "on_message": False,
@@ -86,12 +103,45 @@ class WoWTools(
         self.config.register_global(**default_global)
         self.config.register_guild(**default_guild)
         self.config.register_user(**default_user)
-        self.limiter = AsyncLimiter(100, time_period=1)
+        self.limiter = BlizzardLimiter()
         self.session = aiohttp.ClientSession(headers={"User-Agent": "Red-DiscordBot/WoWToolsCog"})
         self.raiderio_api = RaiderIO()
         self.blizzard: dict[str, WowApi] = {}
+        # Clients of background jobs by (job, region), see background_blizzard
+        self.background_blizzard_clients: dict[tuple[str, str], WowApi] = {}
         self.cvar_cache: list[CVar] = []
-        self.roster_cache: dict[int, dict] = {}
+        self.roster_cache = AsyncTTLCache(ttl=240)
+        self.raiderio_profiles = StaleWhileRevalidateCache(
+            ttl_for=profile_ttl, max_stale=PROFILE_MAX_STALE, maxsize=512
+        )
+        # Refreshed in the background by refresh_season_cutoffs, the TTL is only a fallback
+        self.season_cutoff_cache = AsyncTTLCache(ttl=60 * 60 * 6)
+        # The season only changes a few times a year, so it's looked up far less often than
+        # the cutoffs that depend on it
+        self.mplus_season_cache = AsyncTTLCache(ttl=60 * 60 * 6)
+        self.mplus_seasons: dict[str, str] = {}
+        self.pvp_seasons = AsyncTTLCache(ttl=60 * 60 * 6)
+        # Blizzard recalculates the leaderboards a few times an hour at most
+        self.pvp_leaderboards = AsyncTTLCache(ttl=60 * 30, maxsize=128)
+        self.assistant_embedding_queue: dict[int, tuple[str, str, float]] = {}
+        self.assistant_embedding_hashes: dict[int, str] = {}
+        self.scoreboard_messages: dict[int, discord.PartialMessage | discord.Message] = {}
+        self.thumbnail_cache = ThumbnailCache(self.session, cog_data_path(self) / "thumbnails")
+        self.render_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="wowtools")
+        self.assets = AssetRegistry(bundled_data_path(self))
+        self.connected_realms = ConnectedRealmIndex(cog_data_path(self) / "connected_realms.json")
+        # Refreshed in the background by refresh_auction_snapshots, the TTL drops realms that
+        # are no longer set up in a guild or looked up
+        self.auction_snapshots = AsyncTTLCache(ttl=60 * 60 * 2, maxsize=64)
+        # Monotonic time of the last lookup of each (region, c_realm_id) snapshot
+        self.auction_lookups: dict[tuple[str, int], float] = {}
+        self.price_history = PriceHistory(cog_data_path(self) / "price_history.db")
+        # Price history writes of snapshots fetched for a command, by (region, c_realm_id)
+        self.price_history_writes: dict[tuple[str, int], asyncio.Task] = {}
+        # Latest quote per region, kept current by refresh_token_prices
+        self.token_quotes: dict[str, TokenQuote] = {}
+        self.item_index = ItemIndex(cog_data_path(self) / "item_index.json")
+        self.item_index_loaded = asyncio.Event()
         self.update_dungeon_scoreboard.start()
         log.info("Dungeon scoreboard updater started.")
         self.guild_log.start()
@@ -100,6 +150,20 @@ class WoWTools(
         log.info("Countdown channel updater started.")
         self.update_bot_status.start()
         log.info("Bot status updater started.")
+        self.refresh_season_cutoffs.start()
+        log.info("Season cutoff updater started.")
+        self.push_assistant_embeddings.start()
+        log.info("Assistant embedding updater started.")
+        self.refresh_connected_realms.start()
+        log.info("Connected realm updater started.")
+        self.refresh_auction_snapshots.start()
+        log.info("Auction snapshot updater started.")
+        self.compact_price_history.start()
+        log.info("Price history compaction started.")
+        self.refresh_item_index.start()
+        log.info("Item index updater started.")
+        self.refresh_token_prices.start()
+        log.info("Token price updater started.")
 
         self.current_raid = "tier-mn-1"
 
@@ -125,6 +189,14 @@ class WoWTools(
         raiderio_api_key = await self.bot.get_shared_api_tokens("raiderio")
         self.raiderio_api = RaiderIO(api_key=raiderio_api_key.get("api_key"))
         await self.create_bnet_objs()
+        await asyncio.to_thread(
+            self.assets.load,
+            [SCOREBOARD_BACKGROUND, SCOREBOARD_BACKGROUND_DEV],
+            [SCOREBOARD_FONT],
+        )
+        await asyncio.to_thread(self.connected_realms.load)
+        await asyncio.to_thread(self.item_index.load)
+        self.item_index_loaded.set()
 
     async def create_bnet_objs(self):
         blizzard_api = await self.bot.get_shared_api_tokens("blizzard")
@@ -135,6 +207,33 @@ class WoWTools(
         self.blizzard["eu"] = WowApi(client_id=cid, client_secret=secret, client_region="eu")
         self.blizzard["us"] = WowApi(client_id=cid, client_secret=secret, client_region="us")
         self.blizzard["kr"] = WowApi(client_id=cid, client_secret=secret, client_region="kr")
+        # Recreated with the new credentials when next used
+        self.background_blizzard_clients.clear()
+
+    async def background_blizzard(self, job: str, region: str) -> WowApi | None:
+        """
+        Get a Blizzard client that only one background job uses.
+
+        Leaving a client's ``async with`` closes its session, even under requests that
+        commands are still making with it. Background jobs hold their client for a long time
+        or use it every few minutes, so they each get their own.
+
+        :param job: Name of the job. Only one run of the job may use the client at a time.
+        :param region: Region of the client.
+        :return: The client, or None if the Blizzard API isn't set up.
+        """
+        region = region.lower()
+        if region not in self.blizzard:
+            return None
+        client = self.background_blizzard_clients.get((job, region))
+        if client is None:
+            blizzard_api = await self.bot.get_shared_api_tokens("blizzard")
+            client = self.background_blizzard_clients[(job, region)] = WowApi(
+                client_id=blizzard_api.get("client_id"),
+                client_secret=blizzard_api.get("client_secret"),
+                client_region=region,
+            )
+        return client
 
     @commands.group()
     async def wowset(self, ctx):
@@ -213,6 +312,39 @@ class WoWTools(
         )
         return
 
+    @wowset.command(name="sbworkers")
+    @commands.is_owner()
+    async def wowset_sbworkers(self, ctx: commands.Context, workers: int):
+        """Set how many guild scoreboards can be updated at the same time."""
+        if workers not in range(1, 51):
+            await ctx.send(_("Workers must be between 1 and 50."))
+            return
+        await self.config.scoreboard_workers.set(workers)
+        await ctx.send(_("Scoreboard workers set to {workers}.").format(workers=workers))
+
+    @wowset.command(name="cachestats", hidden=True)
+    @commands.is_owner()
+    async def wowset_cachestats(self, ctx: commands.Context):
+        """Show hit and miss counters for the cog's caches."""
+        caches = {
+            "Raider.io rosters": self.roster_cache.stats(),
+            "Raider.io profiles": self.raiderio_profiles.stats(),
+            "Season cutoffs": self.season_cutoff_cache.stats(),
+            "Mythic+ seasons": self.mplus_season_cache.stats(),
+            "PvP leaderboards": self.pvp_leaderboards.stats(),
+            "Thumbnails": self.thumbnail_cache.stats(),
+            "Asset load times": self.assets.stats(),
+            "Connected realms": self.connected_realms.stats(),
+            "Auction snapshots": self.auction_snapshots.stats(),
+            "Item index": {"items": len(self.item_index)},
+            "Blizzard rate limits": self.limiter.stats(),
+        }
+        msg = ""
+        for name, stats in caches.items():
+            msg += f"{name}: " + ", ".join(f"{key} {value}" for key, value in stats.items())
+            msg += "\n"
+        await ctx.send(box(msg))
+
     @wowset.command(name="emote")
     @commands.is_owner()
     async def wowset_emote(
@@ -364,13 +496,12 @@ class WoWTools(
 
     @tasks.loop(minutes=6)
     async def update_countdown_channels(self):
-        for guild in self.bot.guilds:
+        snapshot = await ConfigSnapshot.build(self.config)
+        for guild in snapshot.enabled_guilds(self.bot, "countdown"):
             if await self.bot.cog_disabled_in_guild(self, guild):
                 continue
-            region = await self.config.guild(guild).region()
-            countdown_channel_id: int = await self.config.guild(guild).countdown_channel()
-            if countdown_channel_id is None:
-                continue
+            region = snapshot[guild.id]["region"]
+            countdown_channel_id: int = snapshot[guild.id]["countdown_channel"]
             await set_contextual_locales_from_guild(self.bot, guild)
 
             countdown_channel = guild.get_channel(countdown_channel_id)
@@ -475,6 +606,16 @@ class WoWTools(
         self.guild_log.cancel()
         self.update_countdown_channels.cancel()
         self.update_bot_status.cancel()
+        self.refresh_season_cutoffs.cancel()
+        self.push_assistant_embeddings.cancel()
+        self.refresh_connected_realms.cancel()
+        self.refresh_auction_snapshots.cancel()
+        self.compact_price_history.cancel()
+        self.refresh_item_index.cancel()
+        self.refresh_token_prices.cancel()
+        await asyncio.gather(*self.price_history_writes.values(), return_exceptions=True)
+        self.price_history.close()
+        self.render_executor.shutdown(wait=False, cancel_futures=True)
         log.info("All tasks cancelled.")
 
     async def red_delete_data_for_user(